@@ -0,0 +1,91 @@
+"""
+
+	Compares the broadphases available to fireform.system.motion.
+
+	Usage: python benchmarks/broadphase.py [number of entities] [ticks]
+
+	The same cases are also run by benchmarks/suite.py.
+
+	Fireform needs to be importable, either installed or on PYTHONPATH.
+
+"""
+
+import collections
+import random
+import sys
+import time
+
+import fireform
+from fireform.system.motion import BROADPHASES, is_extrovert
+
+
+def uniform_bullets(count):
+	""" Lots of small entities of the same size spread over a large area. """
+	for i in range(count):
+		yield (random.uniform(0, 4000), random.uniform(0, 4000), 8, 8)
+
+
+def clustered(count):
+	""" Small entities clumped together around a few points. """
+	centres = [(random.uniform(0, 4000), random.uniform(0, 4000)) for i in range(8)]
+	for i in range(count):
+		cx, cy = random.choice(centres)
+		yield (random.gauss(cx, 150), random.gauss(cy, 150), 8, 8)
+
+
+def mixed_sizes(count):
+	""" Mostly small entities, with the occasional large one. """
+	for i in range(count):
+		size = 200 if random.random() < 0.02 else random.uniform(4, 32)
+		yield (random.uniform(0, 4000), random.uniform(0, 4000), size, size)
+
+
+DISTRIBUTIONS = [uniform_bullets, clustered, mixed_sizes]
+
+
+def make_entities(distribution, count):
+	entities = []
+	for x, y, w, h in distribution(count):
+		entities.append(fireform.entity(
+			fireform.data.box(x = x, y = y, width = w, height = h),
+			fireform.data.velocity(x = random.uniform(-3, 3), y = random.uniform(-3, 3))
+		))
+	return entities
+
+
+def run(broadphase, entities, ticks):
+	stats = collections.Counter()
+	total = 0
+	for i in range(ticks):
+		for e in entities:
+			e.box.x += e.velocity.x
+			e.box.y += e.velocity.y
+		pairs = set()
+		start = time.perf_counter()
+		broadphase.update(entities, is_extrovert)
+		broadphase.find_pairs(pairs, stats)
+		total += time.perf_counter() - start
+	return total / ticks, stats['comparisons'] // ticks
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+	ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+	print('{} entities, {} ticks'.format(count, ticks))
+	print('{:<16} {:<8} {:>6} {:>12} {:>12}'.format('distribution', 'method', 'cell', 'ms/tick', 'comparisons'))
+	for distribution in DISTRIBUTIONS:
+		random.seed(0)
+		entities = make_entities(distribution, count)
+		for name, cell_size in [('sweep', 128), ('grid', 16), ('grid', 32), ('grid', 128)]:
+			saved = [(e.box.x, e.box.y) for e in entities]
+			seconds, comparisons = run(BROADPHASES[name](cell_size), entities, ticks)
+			for e, (x, y) in zip(entities, saved):
+				e.box.x = x
+				e.box.y = y
+			print('{:<16} {:<8} {:>6} {:>12.2f} {:>12}'.format(
+				distribution.__name__, name, cell_size, seconds * 1000, comparisons
+			))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,83 @@
+"""
+
+	Measures the cost of building entities, comparing the entity constructor
+	with fireform.prefab, and adding them to a world one at a time or in a batch.
+
+	Usage: python benchmarks/spawn.py [number of entities]
+
+	The same cases are also run by benchmarks/suite.py.
+
+	Fireform needs to be importable, either installed or on PYTHONPATH.
+
+"""
+
+import sys
+import time
+import warnings
+
+import fireform
+
+
+BULLET = fireform.prefab.prefab(
+	(fireform.data.box, {'width': 12, 'height': 12}),
+	fireform.data.velocity,
+	(fireform.data.collision_mask, {'shape': 'circle'}),
+	tags = 'bullet'
+)
+
+
+def build_constructor(count):
+	return [fireform.entity(
+		fireform.data.box(width = 12, height = 12),
+		fireform.data.velocity(),
+		fireform.data.collision_mask('circle'),
+		tags = 'bullet'
+	) for i in range(count)]
+
+
+def build_prefab(count):
+	return BULLET.stamp(count)
+
+
+def make_world():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	world.filter_root.chain('box > -#no-debug')
+	return world
+
+
+def add_single(world, entities):
+	world.add_entities(entities)
+
+
+def add_batch(world, entities):
+	world.spawn_batch(entities)
+	world.refresh_entities()
+
+
+def timed(function, *args):
+	start = time.perf_counter()
+	result = function(*args)
+	return time.perf_counter() - start, result
+
+
+def main():
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+	# Deprecated calls made while building entities would otherwise flood the output
+	warnings.simplefilter('ignore', DeprecationWarning)
+	print('{:<12} {:<8} {:>10} {:>10} {:>14}'.format('build', 'add', 'build ms', 'add ms', 'us per entity'))
+	for build in [build_constructor, build_prefab]:
+		for add in [add_single, add_batch]:
+			build_time, entities = timed(build, count)
+			add_time, _ = timed(add, make_world(), entities)
+			print('{:<12} {:<8} {:>10.2f} {:>10.2f} {:>14.2f}'.format(
+				build.__name__[6:],
+				add.__name__[4:],
+				build_time * 1000,
+				add_time * 1000,
+				(build_time + add_time) / count * 1e6
+			))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,373 @@
+"""
+
+	Runs all the benchmarks against scenes of different sizes, without a window.
+
+	Usage: python benchmarks/suite.py [options]
+
+		--quick           Only run the smallest scene of each benchmark.
+		--filter TEXT     Only run the benchmarks whose names contain TEXT.
+		--repeat N        Number of times each case is timed. Defaults to 10.
+		--json FILE       Save the results to FILE.
+		--compare FILE    Compare the results with ones saved earlier.
+		                  A positive change means that a case got faster.
+
+	Each case is timed ``repeat`` times, and the best time is reported,
+	along with how many times it could run each second. For the benchmarks
+	that time a tick, that is the number of ticks per second.
+
+	Fireform needs to be importable, either installed or on PYTHONPATH.
+
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import time
+import warnings
+
+import fireform
+import fireform.engine
+import fireform.tiled
+from fireform.system.motion import BROADPHASES, is_extrovert
+
+import broadphase
+import spawn
+
+
+############################################### SCENES
+
+class busy(fireform.behaviour.base):
+	""" A behaviour that does a little work every tick. """
+
+	def __init__(self):
+		self.ticks = 0
+
+	def m_tick(self, world, entity, message):
+		self.ticks += 1
+
+
+def make_walls(count, area):
+	""" Walls on a grid that covers the area, which never move. """
+	side = max(1, int(count ** 0.5))
+	gap = area / side
+	return [fireform.entity(
+		fireform.data.box(x = (i % side) * gap, y = (i // side) * gap, width = 32, height = 32),
+		tags = 'static'
+	) for i in range(count)]
+
+
+def make_bullets(count, area):
+	return [fireform.entity(
+		fireform.data.box(x = random.uniform(0, area), y = random.uniform(0, area), width = 8, height = 8),
+		fireform.data.velocity(x = random.uniform(-4, 4), y = random.uniform(-4, 4))
+	) for i in range(count)]
+
+
+def wrap(entities, area):
+	""" Keeps moving entities inside the area, so that the scene stays the same size. """
+	for e in entities:
+		e.box.x %= area
+		e.box.y %= area
+
+
+def make_map(size, tile_dim, objects):
+	""" Returns the json of a tiled map that is ``size`` tiles wide and high. """
+	return json.dumps({
+		'width': size,
+		'height': size,
+		'tilewidth': tile_dim,
+		'tileheight': tile_dim,
+		'tilesets': [{'name': 'benchmark_tiles'}],
+		'layers': [
+			{
+				'name': 'ground',
+				'type': 'tilelayer',
+				'width': size,
+				'height': size,
+				'data': [random.randint(0, 64) for i in range(size * size)]
+			},
+			{
+				'name': 'walls',
+				'type': 'objectgroup',
+				'objects': [{
+					'x': random.uniform(0, size * tile_dim),
+					'y': random.uniform(0, size * tile_dim),
+					'width': tile_dim,
+					'height': tile_dim
+				} for i in range(objects)]
+			}
+		]
+	})
+
+
+############################################### BENCHMARKS
+
+# Each benchmark takes the parameters of a scene, and returns a function that
+# gets a case ready to be timed. That function returns the function to time.
+# Things that should not be timed, such as making entities, go in between.
+
+def dispatch(entities, behaviours):
+	""" Sends a tick to entities which each have some behaviours that handle it. """
+	world = fireform.world.world()
+	kinds = [type('busy_{}'.format(i), (busy,), {}) for i in range(behaviours)]
+	world.add_entities(fireform.entity(*[k() for k in kinds]) for i in range(entities))
+	def tick():
+		world.handle_message(fireform.message.tick())
+	return lambda: tick
+
+
+def collisions(walls, bullets, method):
+	""" Finds the collisions of bullets moving among walls. """
+	area = 4000
+	world = fireform.world.world()
+	motion = fireform.system.motion(broadphase = method, cell_size = 32 if method == 'grid' else 128, static_index = True)
+	world.add_system(motion)
+	world.add_entities(make_walls(walls, area))
+	moving = make_bullets(bullets, area)
+	world.add_entities(moving)
+	def prepare():
+		motion.update_position(0)
+		motion.update_position(1)
+		wrap(moving, area)
+		return lambda: motion.check_collisions(world, None)
+	return prepare
+
+
+def world_tick(walls, bullets):
+	""" Runs whole ticks of a world with motion, cameras and images. """
+	area = 4000
+	world = fireform.world.world()
+	world.add_system(fireform.system.camera())
+	world.add_system(fireform.system.image())
+	world.add_system(fireform.system.motion(static_index = True))
+	world.add_entities(make_walls(walls, area))
+	moving = make_bullets(bullets, area)
+	world.add_entities(moving)
+	def prepare():
+		wrap(moving, area)
+		return lambda: fireform.main.run(world, ticks = 1)
+	return prepare
+
+
+def filter_insert(entities, batch):
+	""" Adds entities to a world that has the filters of the usual systems. """
+	add = spawn.add_batch if batch else spawn.add_single
+	def prepare():
+		world = spawn.make_world()
+		world.add_system(fireform.system.camera())
+		world.add_system(fireform.system.image())
+		made = spawn.build_prefab(entities)
+		return lambda: add(world, made)
+	return prepare
+
+
+def build(entities, method):
+	""" Makes entities, either with the constructor or a prefab. """
+	function = spawn.build_prefab if method == 'prefab' else spawn.build_constructor
+	return lambda: lambda: function(entities)
+
+
+def broadphases(entities, distribution, method, cell_size):
+	""" Finds the overlapping pairs using just a broadphase. """
+	made = broadphase.make_entities(getattr(broadphase, distribution), entities)
+	phase = BROADPHASES[method](cell_size)
+	stats = {'comparisons': 0, 'queries': 0}
+	def find():
+		phase.update(made, is_extrovert)
+		phase.find_pairs(set(), stats)
+	def prepare():
+		for e in made:
+			e.box.x += e.velocity.x
+			e.box.y += e.velocity.y
+		return find
+	return prepare
+
+
+def tiled_load(size, objects):
+	""" Loads a tiled map into a new world. """
+	tile_dim = 32
+	fireform.resource.cache['benchmark_tiles'] = [fireform.engine.current.image(texture = (256, 256))]
+	text = make_map(size, tile_dim, objects)
+	def prepare():
+		world = fireform.world.world()
+		data = json.loads(text)
+		return lambda: fireform.tiled.json_parse(world, data, {'walls': 'solid'})
+	return prepare
+
+
+def update_sprites(entities, visible):
+	""" Moves the sprites of entities, some of which are on the screen. """
+	fireform.resource.cache['benchmark_image'] = [fireform.engine.current.image(texture = (16, 16))]
+	world = fireform.world.world()
+	world.add_system(fireform.system.camera())
+	images = fireform.system.image()
+	world.add_system(images)
+	world.post_message(fireform.message.window_resized(1280, 800))
+	# Spread the entities out so that about the right fraction are on the screen
+	area = 1280 / visible ** 0.5
+	for i in range(entities):
+		world.add_entity(fireform.entity(
+			fireform.data.box(x = random.uniform(-area / 2, area / 2), y = random.uniform(-area / 2, area / 2), width = 16, height = 16),
+			fireform.data.image('benchmark_image')
+		))
+	return lambda: lambda: images.update_sprites(True)
+
+
+def raycasts(walls, rays):
+	""" Casts rays among walls, like the vision cones of lots of enemies. """
+	area = 4000
+	world = fireform.world.world()
+	motion = fireform.system.motion()
+	world.add_system(motion)
+	world.add_entities(make_walls(walls, area))
+	cast = [(random.uniform(0, area), random.uniform(0, area), random.uniform(0, area), random.uniform(0, area)) for i in range(rays)]
+	return lambda: lambda: motion.raycast_many(cast)
+
+
+# The name, function and scenes of each benchmark. The first scene is the smallest.
+BENCHMARKS = [
+	('dispatch', dispatch, [
+		{'entities': 1000, 'behaviours': 1},
+		{'entities': 1000, 'behaviours': 5},
+		{'entities': 10000, 'behaviours': 1},
+	]),
+	('collisions', collisions, [
+		{'walls': 500, 'bullets': 500, 'method': 'sweep'},
+		{'walls': 500, 'bullets': 500, 'method': 'grid'},
+		{'walls': 2000, 'bullets': 5000, 'method': 'sweep'},
+		{'walls': 2000, 'bullets': 5000, 'method': 'grid'},
+	]),
+	('world_tick', world_tick, [
+		{'walls': 500, 'bullets': 500},
+		{'walls': 2000, 'bullets': 5000},
+	]),
+	('filter_insert', filter_insert, [
+		{'entities': 1000, 'batch': False},
+		{'entities': 1000, 'batch': True},
+		{'entities': 10000, 'batch': False},
+		{'entities': 10000, 'batch': True},
+	]),
+	('build', build, [
+		{'entities': 1000, 'method': 'constructor'},
+		{'entities': 1000, 'method': 'prefab'},
+	]),
+	('broadphase', broadphases, [
+		{'entities': 1000, 'distribution': 'uniform_bullets', 'method': 'sweep', 'cell_size': 128},
+		{'entities': 3000, 'distribution': 'uniform_bullets', 'method': 'grid', 'cell_size': 32},
+		{'entities': 3000, 'distribution': 'clustered', 'method': 'sweep', 'cell_size': 128},
+		{'entities': 3000, 'distribution': 'clustered', 'method': 'grid', 'cell_size': 32},
+		{'entities': 3000, 'distribution': 'mixed_sizes', 'method': 'grid', 'cell_size': 128},
+	]),
+	('tiled_load', tiled_load, [
+		{'size': 32, 'objects': 100},
+		{'size': 128, 'objects': 1000},
+	]),
+	('update_sprites', update_sprites, [
+		{'entities': 1000, 'visible': 0.5},
+		{'entities': 10000, 'visible': 0.1},
+	]),
+	('raycast', raycasts, [
+		{'walls': 500, 'rays': 100},
+		{'walls': 2000, 'rays': 2000},
+	]),
+]
+
+
+############################################### RUNNING
+
+def time_case(prepare, repeat):
+	""" Returns the time taken by each run of a case, in seconds. """
+	times = []
+	enabled = gc.isenabled()
+	for i in range(repeat):
+		function = prepare()
+		gc.collect()
+		gc.disable()
+		try:
+			start = time.perf_counter()
+			function()
+			times.append(time.perf_counter() - start)
+		finally:
+			if enabled:
+				gc.enable()
+	return times
+
+
+def describe(params):
+	return ' '.join('{}={}'.format(k, v) for k, v in params.items())
+
+
+def run_all(quick = False, match = '', repeat = 10):
+	""" Runs the benchmarks, and yields the result of each case as it finishes. """
+	for name, function, scenes in BENCHMARKS:
+		if match not in name:
+			continue
+		for params in scenes[:1] if quick else scenes:
+			# Every case is made from the same random numbers
+			random.seed(0)
+			times = time_case(function(**params), repeat)
+			best = min(times)
+			result = {
+				'name': name,
+				'params': params,
+				'repeat': repeat,
+				'best': best,
+				'mean': statistics.mean(times),
+				'median': statistics.median(times),
+				'per_second': 1 / best if best else None
+			}
+			yield result
+
+
+def key(result):
+	return (result['name'], json.dumps(result['params'], sort_keys = True))
+
+
+def main():
+	parser = argparse.ArgumentParser(description = 'Runs the fireform benchmarks.')
+	parser.add_argument('--quick', action = 'store_true')
+	parser.add_argument('--filter', default = '')
+	parser.add_argument('--repeat', type = int, default = 10)
+	parser.add_argument('--json')
+	parser.add_argument('--compare')
+	args = parser.parse_args()
+
+	# Deprecated calls made while building entities would otherwise flood the output
+	warnings.simplefilter('ignore', DeprecationWarning)
+	fireform.engine.load('headless')
+
+	previous = {}
+	if args.compare:
+		with open(args.compare) as f:
+			previous = {key(i): i for i in json.load(f)['results']}
+
+	print('{:<16} {:<72} {:>10} {:>12} {:>8}'.format('benchmark', 'scene', 'best ms', 'per second', 'change'))
+	results = []
+	for result in run_all(args.quick, args.filter, args.repeat):
+		results.append(result)
+		old = previous.get(key(result))
+		change = '{:+.0%}'.format(old['best'] / result['best'] - 1) if old and result['best'] else ''
+		print('{:<16} {:<72} {:>10.3f} {:>12.1f} {:>8}'.format(
+			result['name'],
+			describe(result['params']),
+			result['best'] * 1000,
+			result['per_second'] or 0,
+			change
+		))
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump({
+				'python': platform.python_version(),
+				'implementation': platform.python_implementation(),
+				'machine': platform.machine(),
+				'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+				'results': results
+			}, f, indent = 2)
+
+
+if __name__ == '__main__':
+	main()
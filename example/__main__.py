@@ -61,12 +61,12 @@ class behaviour_player(fireform.behaviour.base):
 		self.cooldown -= 1
 		if self.shooting and self.cooldown <= 0:
 			self.cooldown = 3
-			world.add_entity(make_bullet(
+			bullets.spawn(
 				entity.box.x,
 				entity.box.y,
 				self.target['x'],
 				self.target['y']
-			))
+			)
 			fireform.audio.play('shoot', volume = 0.4)
 
 	def m_mouse_move(self, world, entity, message):
@@ -166,23 +166,30 @@ def make_player():
 		tags = 'player moveable'
 	)
 
-def make_bullet(x, y, x_to, y_to):
+def make_bullet():
 	return fireform.entity.entity(
-		fireform.data.box(
-			pos = (x, y),
-			size = (12, 12)
-		),
+		fireform.data.box(size = (12, 12)),
 		fireform.data.collision_mask('circle'),
-		fireform.data.velocity(
-			fireform.geom.vector(
-				x_to - x + random.randint(-10, 10),
-				y_to - y + random.randint(-10, 10)
-			).normalised(80)
-		),
-		fireform.data.image('bullet', blend = 'add', rotation = math.degrees(math.atan2(x_to - x, y_to - y))),
+		fireform.data.velocity(),
+		fireform.data.image('bullet', blend = 'add'),
 		tags = 'bullet'
 	)
 
+def aim_bullet(bullet, x, y, x_to, y_to):
+	velocity = fireform.geom.vector(
+		x_to - x + random.randint(-10, 10),
+		y_to - y + random.randint(-10, 10)
+	).normalised(80)
+	bullet.box.x = x
+	bullet.box.y = y
+	bullet.velocity.x = velocity.x
+	bullet.velocity.y = velocity.y
+	bullet.image.rotation = math.degrees(math.atan2(x_to - x, y_to - y))
+
+# Bullets are recycled once they are destroyed, rather than being made again
+bullets = fireform.system.pool(make_bullet, aim_bullet, name = 'bullets')
+world.add_system(bullets)
+
 def make_monster(x, y):
 	return fireform.entity.entity(
 		fireform.data.box(
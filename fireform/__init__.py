@@ -20,8 +20,23 @@ import fireform.resource
 import fireform.util
 import fireform.audio
 import fireform.efilter
+import fireform.prefab
 import fireform.geom
 import fireform.engine
 
 from fireform.entity import entity
+
+
+def configure(debug = None):
+	""" Changes global settings.
+
+		:Parameters:
+			`debug` : bool
+				If false, entities made from now on skip the checks that catch mistakes,
+				which makes them faster. This can also be turned off by setting the
+				``FIREFORM_DEBUG`` environment variable to ``0``.
+				Released games should turn this off.
+	"""
+	if debug is not None:
+		entity.debug = bool(debug)
 # IDEA: Import world here?
@@ -17,6 +17,22 @@ def get_message_handles(behaviour):
 	return subscription_cache[the_class]
 
 
+def bind_message_handles(behaviour):
+	"""Resolves the message handlers of a behaviour.
+
+	Produces ``(message_name, handler, surpass_frozen)`` tuples, where ``handler``
+	is the bound ``m_`` method. Handlers assigned to the instance itself are
+	included as well as those defined on the class.
+	"""
+	names = list(get_message_handles(behaviour))
+	for name in getattr(behaviour, '__dict__', ()):
+		if name.startswith('m_') and name[2:] not in names:
+			names.append(name[2:])
+	for name in names:
+		handler = getattr(behaviour, 'm_' + name)
+		yield name, handler, hasattr(handler, '_surpass_frozen')
+
+
 class base:
 	"""Base class for behaviours.
 
@@ -25,7 +41,7 @@ class base:
 
 	def handle_message(self, world, entity, message):
 		"""Used internally."""
-		func_name = 'm_' + message.decipher_name()
+		func_name = message.handler_name or 'm_' + message.decipher_name()
 		if hasattr(self, func_name):
 			f = getattr(self, func_name)
 			if not world.frozen or hasattr(f, '_surpass_frozen'):
@@ -0,0 +1,342 @@
+""" Storage of the motion components in contiguous arrays.
+
+	This requires numpy.
+
+	When an entity is inserted into an :class:`array_store`, its ``box``, ``velocity``,
+	``acceleration`` and ``friction`` components are changed in place so that their
+	values live in a row of the store's arrays. The components keep working as
+	they did before, so nothing else needs to know about the store. When the entity
+	is removed, the values are copied back into the components.
+
+"""
+
+from fireform.geom import vector
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+class array_vector(vector):
+	""" A vector that reads and writes a row of one of the store's arrays. """
+
+	__slots__ = ['store', 'field', 'row']
+
+	def __init__(self, store, field, row):
+		self.store = store
+		self.field = field
+		self.row = row
+
+	@property
+	def x(self):
+		return getattr(self.store, self.field).item(self.row, 0)
+
+	@x.setter
+	def x(self, value):
+		getattr(self.store, self.field)[self.row, 0] = value
+
+	@property
+	def y(self):
+		return getattr(self.store, self.field).item(self.row, 1)
+
+	@y.setter
+	def y(self, value):
+		getattr(self.store, self.field)[self.row, 1] = value
+
+
+class _array_box:
+	""" Mixed into box components while they are held by a store. """
+
+	__slots__ = ()
+
+	def __copy__(self):
+		# Copies are ordinary boxes, which are not held by the store
+		result = object.__new__(type(self).__bases__[1])
+		result.position = vector(self.x, self.y)
+		result.size = vector(self.width, self.height)
+		result.anchor = vector(*self._ff_store.anchor[self._ff_row].tolist())
+		return result
+
+	def __deepcopy__(self, memo):
+		return self.__copy__()
+
+	@property
+	def position(self):
+		return self._ff_views[0]
+
+	@position.setter
+	def position(self, value):
+		x, y = value
+		self._ff_store.position[self._ff_row] = (x, y)
+
+	@property
+	def size(self):
+		return self._ff_views[1]
+
+	@size.setter
+	def size(self, value):
+		x, y = value
+		self._ff_store.size[self._ff_row] = (x, y)
+
+	@property
+	def anchor(self):
+		return self._ff_views[2]
+
+	@anchor.setter
+	def anchor(self, value):
+		x, y = value
+		self._ff_store.anchor[self._ff_row] = (x, y)
+
+	@property
+	def x(self):
+		return self._ff_store.position.item(self._ff_row, 0)
+
+	@x.setter
+	def x(self, v):
+		self._ff_store.position[self._ff_row, 0] = v
+
+	@property
+	def y(self):
+		return self._ff_store.position.item(self._ff_row, 1)
+
+	@y.setter
+	def y(self, v):
+		self._ff_store.position[self._ff_row, 1] = v
+
+	@property
+	def width(self):
+		return self._ff_store.size.item(self._ff_row, 0)
+
+	@width.setter
+	def width(self, v):
+		self._ff_store.size[self._ff_row, 0] = v
+
+	@property
+	def height(self):
+		return self._ff_store.size.item(self._ff_row, 1)
+
+	@height.setter
+	def height(self, v):
+		self._ff_store.size[self._ff_row, 1] = v
+
+	@property
+	def left(self):
+		s = self._ff_store
+		r = self._ff_row
+		return s.position.item(r, 0) - s.size.item(r, 0) * s.anchor.item(r, 0)
+
+	@left.setter
+	def left(self, v):
+		s = self._ff_store
+		r = self._ff_row
+		s.position[r, 0] = v + s.size.item(r, 0) * s.anchor.item(r, 0)
+
+	@property
+	def right(self):
+		s = self._ff_store
+		r = self._ff_row
+		return s.position.item(r, 0) + s.size.item(r, 0) * (1 - s.anchor.item(r, 0))
+
+	@right.setter
+	def right(self, v):
+		s = self._ff_store
+		r = self._ff_row
+		s.position[r, 0] = v - s.size.item(r, 0) * (1 - s.anchor.item(r, 0))
+
+	@property
+	def bottom(self):
+		s = self._ff_store
+		r = self._ff_row
+		return s.position.item(r, 1) - s.size.item(r, 1) * s.anchor.item(r, 1)
+
+	@bottom.setter
+	def bottom(self, v):
+		s = self._ff_store
+		r = self._ff_row
+		s.position[r, 1] = v + s.size.item(r, 1) * s.anchor.item(r, 1)
+
+	@property
+	def top(self):
+		s = self._ff_store
+		r = self._ff_row
+		return s.position.item(r, 1) + s.size.item(r, 1) * (1 - s.anchor.item(r, 1))
+
+	@top.setter
+	def top(self, v):
+		s = self._ff_store
+		r = self._ff_row
+		s.position[r, 1] = v - s.size.item(r, 1) * (1 - s.anchor.item(r, 1))
+
+
+class _array_xy:
+	""" Mixed into vector-based components while they are held by a store. """
+
+	__slots__ = ()
+
+	def __copy__(self):
+		return type(self).__bases__[1](self.x, self.y)
+
+	def __deepcopy__(self, memo):
+		return self.__copy__()
+
+	@property
+	def x(self):
+		return getattr(self._ff_store, self._ff_field).item(self._ff_row, 0)
+
+	@x.setter
+	def x(self, value):
+		getattr(self._ff_store, self._ff_field)[self._ff_row, 0] = value
+
+	@property
+	def y(self):
+		return getattr(self._ff_store, self._ff_field).item(self._ff_row, 1)
+
+	@y.setter
+	def y(self, value):
+		getattr(self._ff_store, self._ff_field)[self._ff_row, 1] = value
+
+
+_array_classes = {}
+
+
+def _array_class(cls, mixin):
+	if cls not in _array_classes:
+		_array_classes[cls] = type('array_' + cls.__name__, (mixin, cls), {'__slots__': ()})
+	return _array_classes[cls]
+
+
+# Components that can be held by the store, and the array that holds their values.
+XY_FIELDS = ['velocity', 'acceleration', 'friction']
+
+
+class array_store:
+	""" Holds the motion components of many entities in numpy arrays.
+
+		Each entity is given a row in the ``position``, ``size``, ``anchor``,
+		``velocity``, ``acceleration`` and ``friction`` arrays, each of which has
+		two columns. Rows of entities that lack a component hold values that do
+		nothing: zero velocity and acceleration, and a friction of one.
+		Only the rows marked in ``moving``, which belong to entities with a velocity,
+		are accelerated and moved.
+
+		Copies of the components held by a store are ordinary components.
+
+		This can be piped from a :class:`fireform.efilter.Filter`.
+
+		:Parameters:
+			`capacity` : int
+				The number of rows to start with. The arrays grow as needed.
+	"""
+
+	def __init__(self, capacity = 256):
+		if numpy is None:
+			raise ImportError('fireform.data.store.array_store requires numpy')
+		self.capacity = 0
+		self.position = numpy.zeros((0, 2))
+		self.size = numpy.zeros((0, 2))
+		self.anchor = numpy.zeros((0, 2))
+		self.velocity = numpy.zeros((0, 2))
+		self.acceleration = numpy.zeros((0, 2))
+		self.friction = numpy.ones((0, 2))
+		self.moving = numpy.zeros(0, dtype = bool)
+		self.free = []
+		self.rows = {}
+		self.hash = id(self)
+		self.grow(capacity)
+
+	def __len__(self):
+		return len(self.rows)
+
+	def __contains__(self, entity):
+		return entity in self.rows
+
+	def grow(self, capacity):
+		""" Enlarge the arrays to hold at least ``capacity`` rows. """
+		if capacity <= self.capacity:
+			return
+		extra = capacity - self.capacity
+		for name in ('position', 'size', 'anchor', 'velocity', 'acceleration'):
+			setattr(self, name, numpy.concatenate((getattr(self, name), numpy.zeros((extra, 2)))))
+		self.friction = numpy.concatenate((self.friction, numpy.ones((extra, 2))))
+		self.moving = numpy.concatenate((self.moving, numpy.zeros(extra, dtype = bool)))
+		self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+		self.capacity = capacity
+
+	def insert(self, entity):
+		""" Move the entity's motion components into the store. """
+		if entity in self.rows:
+			return
+		if not self.free:
+			self.grow(max(self.capacity * 2, 16))
+		row = self.free.pop()
+		self.rows[entity] = row
+		# Without a velocity, acceleration and friction do nothing, as they do outside the store
+		self.moving[row] = entity['velocity'] is not None
+		box = entity['box']
+		if box is not None:
+			self.position[row] = (box.position.x, box.position.y)
+			self.size[row] = (box.size.x, box.size.y)
+			self.anchor[row] = (box.anchor.x, box.anchor.y)
+			box.__class__ = _array_class(type(box), _array_box)
+			box._ff_store = self
+			box._ff_row = row
+			box._ff_views = (
+				array_vector(self, 'position', row),
+				array_vector(self, 'size', row),
+				array_vector(self, 'anchor', row)
+			)
+		for field in XY_FIELDS:
+			c = entity[field]
+			if c is not None:
+				getattr(self, field)[row] = (c.x, c.y)
+				c.__class__ = _array_class(type(c), _array_xy)
+				c._ff_store = self
+				c._ff_field = field
+				c._ff_row = row
+
+	def remove(self, entity):
+		""" Copy the values back into the entity's components and release its row. """
+		row = self.rows.pop(entity, None)
+		if row is None:
+			return
+		box = entity['box']
+		if box is not None and isinstance(box, _array_box):
+			position = vector(*self.position[row].tolist())
+			size = vector(*self.size[row].tolist())
+			anchor = vector(*self.anchor[row].tolist())
+			box.__class__ = type(box).__bases__[1]
+			del box._ff_store, box._ff_row, box._ff_views
+			box.position = position
+			box.size = size
+			box.anchor = anchor
+		for field in XY_FIELDS:
+			c = entity[field]
+			if c is not None and isinstance(c, _array_xy):
+				x, y = getattr(self, field)[row].tolist()
+				c.__class__ = type(c).__bases__[1]
+				del c._ff_store, c._ff_field, c._ff_row
+				c.x = x
+				c.y = y
+		self.position[row] = 0
+		self.size[row] = 0
+		self.anchor[row] = 0
+		self.velocity[row] = 0
+		self.acceleration[row] = 0
+		self.friction[row] = 1
+		self.moving[row] = False
+		self.free.append(row)
+
+	def accelerate(self):
+		""" Apply acceleration and then friction to the velocity of each moving row. """
+		m = self.moving
+		self.velocity[m] += self.acceleration[m]
+		self.velocity[m] *= self.friction[m]
+
+	def move(self, axis = None):
+		""" Add velocity to position, along a single axis (0 or 1) or both. """
+		m = self.moving
+		if axis is None:
+			self.position[m] += self.velocity[m]
+		else:
+			self.position[m, axis] += self.velocity[m, axis]
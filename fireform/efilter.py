@@ -6,12 +6,26 @@
 	That is, the valid state of the entity cannot change once it is accepted by
 	the filter. The exception to this is if the entity is destroyed.
 
+	Rules are compiled into masks of bits, one for each component name and tag,
+	and tested against the mask that each entity carries.
+
+	Entities are removed from the filters when they are killed, by the world,
+	so iterating over a filter never needs to check whether entities are alive.
+	Entities removed while a filter is being iterated over are removed once
+	the iteration finishes.
+
+	If the world keeps an :class:`ArchetypeIndex`, the filters hanging off its root
+	filter are iterated over as the union of the archetypes that match their rules,
+	rather than entity by entity.
+
 	Requirements formatting:
 
 		Function:
 
 			The 'requirements' may be a single function, which takes
 			in an entity and outputs either True or False.
+			Filters made from functions cannot use archetypes, so they,
+			and the filters below them, hold their entities themselves.
 
 		String:
 
@@ -32,10 +46,46 @@
 """
 
 
-import hashlib
 import collections
 
 
+# Each component name and tag is given a bit in the masks that entities carry.
+# Tags are stored with a '#' in front of them, so they cannot clash with component names.
+_bits = {}
+# All of the bits that belong to tags
+_tag_bits = 0
+# Compiled queries, by their rules
+_queries = {}
+
+
+def bit(name):
+	""" Returns the bit that represents a component name, or a tag written as ``'#tag'``. """
+	global _tag_bits
+	result = _bits.get(name)
+	if result is None:
+		result = _bits[name] = 1 << len(_bits)
+		if name.startswith('#'):
+			_tag_bits |= result
+	return result
+
+
+def tag_mask(tags):
+	""" Returns the mask of a collection of tags. """
+	result = 0
+	for i in tags:
+		result |= bit('#' + i)
+	return result
+
+
+def entity_mask(entity):
+	""" Works out the mask of an entity from its current tags and the components in its mask.
+
+		Components cannot be taken off an entity, but tags can, so the bits of the
+		tags are replaced rather than added to.
+	"""
+	return (entity._ff_mask & ~_tag_bits) | tag_mask(entity.tags)
+
+
 def parse_rule(rule):
 	result = True
 	# Rule to check if the entity is alive
@@ -59,34 +109,122 @@ def parse_rule(rule):
 	return lambda entity: result == (entity[name] != None)
 
 
-def parse_rules(rules):
-	if callable(rules):
-		return rules
-	else:
-		rules = rules.replace(' ', '')
-		if rules == '':
-			return lambda entity: True
-		rules = rules.split(',\n')
-		rules.sort()
-		functions = []
-		for i in rules:
-			functions.append(parse_rule(i))
-		return lambda entity: all(f(entity) for f in functions)
+def compile_rules(rules):
+	""" Compiles rules into a pair of masks, ``(required, excluded)``.
+
+		An entity matches the rules if its mask contains every bit of ``required``,
+		and none of the bits of ``excluded``.
+	"""
+	rules = rules.replace(' ', '')
+	required = 0
+	excluded = 0
+	if rules == '':
+		return required, excluded
+	for rule in rules.split(',\n'):
+		# Validates the special rules
+		parse_rule(rule)
+		if rule.startswith('-'):
+			excluded |= bit(rule[1:])
+		else:
+			required |= bit(rule)
+	return required, excluded
 
 
-def hash_rules(rules):
-	return hashlib.sha224(rules.encode('utf-8')).hexdigest()
+class DenseSet:
+	""" A set that keeps its items packed into a list.
 
+		Iteration walks the list, in a stable order. Removing an item moves
+		the last item into its place, so both adding and removing take constant time.
+	"""
 
-class Filter:
+	def __init__(self):
+		self.items = []
+		self.index = {}
+
+	def add(self, item):
+		if item not in self.index:
+			self.index[item] = len(self.items)
+			self.items.append(item)
 
-	def __init__(self, rules):
-		self.rules = rules.replace(' ', '')
-		self.entities = set()
+	def update(self, items):
+		for i in items:
+			self.add(i)
+
+	def discard(self, item):
+		i = self.index.pop(item, None)
+		if i is not None:
+			last = self.items.pop()
+			if last is not item:
+				self.items[i] = last
+				self.index[last] = i
+
+	def remove(self, item):
+		if item not in self.index:
+			raise KeyError(item)
+		self.discard(item)
+
+	def __contains__(self, item):
+		return item in self.index
+
+	def __len__(self):
+		return len(self.items)
+
+	def __iter__(self):
+		return iter(self.items)
+
+
+class Filter:
+	""" Holds the entities that match a set of rules.
+
+		:Parameters:
+			`rules` : string or callable
+				The requirements of the filter.
+			`dense` : bool
+				If true, the entities are kept in a :class:`DenseSet`
+				rather than a set, so they are iterated over in a stable order.
+				Defaults to False. This has no effect on filters that use archetypes.
+	"""
+
+	def __init__(self, rules, dense = False):
+		self.entities = DenseSet() if dense else set()
 		self.children = []
-		self.predicate = parse_rules(self.rules)
-		self.hash = hash_rules(self.rules)
+		if callable(rules):
+			self.rules = rules
+			self.predicate = rules
+			self.masked = False
+			self.required, self.excluded = 0, 0
+			self.hash = rules
+		else:
+			self.rules = rules.replace(' ', '')
+			self.masked = True
+			self.required, self.excluded = compile_rules(self.rules)
+			self.hash = (self.required, self.excluded)
 		self.rejected = False
+		# Number of iterations in progress, and the removals waiting for them to finish
+		self.iterating = 0
+		self.deferred = []
+		# Set by use_archetypes, along with the masks of this filter and all those above it
+		self.archetypes = None
+		self.query = (self.required, self.excluded)
+
+	def use_archetypes(self, index, query = (0, 0)):
+		""" Iterate over the archetypes in ``index`` that match this filter, instead of its own entities.
+
+			The filters below this one are made to do the same. ``index`` must hold every entity
+			that reaches this filter, which is the case if it is piped from the root filter.
+			Filters made from functions are left as they are, along with those below them.
+
+			:Parameters:
+				`query` : tuple
+					The combined masks of the filters above this one.
+		"""
+		if not self.masked:
+			return
+		self.archetypes = index
+		self.query = (query[0] | self.required, query[1] | self.excluded)
+		for i in self.children:
+			if isinstance(i, Filter):
+				i.use_archetypes(index, self.query)
 
 	def find_duplicate(self, fil):
 		for i in self.children:
@@ -108,31 +246,64 @@ class Filter:
 			return dup
 		else:
 			self.children.append(to)
-			self.cleanup()
+			if self.archetypes is not None and isinstance(to, Filter):
+				to.use_archetypes(self.archetypes, self.query)
 			for i in self.entities:
 				to.insert(i)
 			return to
 
-	def chain(self, rules):
+	def chain(self, rules, dense = False):
 		""" Spawns a chain of filter hanging off this one, and returns the end.
 			This is probably the cleanest way to make filters.
 		"""
 		rules = rules.split('>')
 		current = self
 		for i in rules:
-			current = current.pipe(Filter(i))
+			current = current.pipe(Filter(i, dense))
 		return current
 
+	def predicate(self, entity):
+		""" Returns whether the entity matches the filter's rules. """
+		mask = entity._ff_mask
+		return mask & self.required == self.required and not mask & self.excluded
+
 	def insert(self, entity):
-		if self.predicate(entity):
+		if self.masked:
+			mask = entity._ff_mask
+			matches = mask & self.required == self.required and not mask & self.excluded
+		else:
+			matches = self.predicate(entity)
+		if matches:
 			self.entities.add(entity)
 			for i in self.children:
 				i.insert(entity)
 			return True
 
+	def insert_many(self, entities):
+		""" Inserts a list of entities, passing the ones that match on to the children as a list. """
+		if self.masked:
+			required = self.required
+			excluded = self.excluded
+			accepted = [i for i in entities if i._ff_mask & required == required and not i._ff_mask & excluded]
+		else:
+			accepted = [i for i in entities if self.predicate(i)]
+		if accepted:
+			self.entities.update(accepted)
+			for child in self.children:
+				insert_many = getattr(child, 'insert_many', None)
+				if insert_many is not None:
+					insert_many(accepted)
+				else:
+					for i in accepted:
+						child.insert(i)
+		return accepted
+
 	def remove(self, entity):
 		if entity in self.entities:
-			self.entities.remove(entity)
+			if self.iterating:
+				self.deferred.append(entity)
+			else:
+				self.entities.remove(entity)
 			for i in self.children:
 				i.remove(entity)
 			return True
@@ -140,22 +311,29 @@ class Filter:
 	def __len__(self):
 		return len(self.entities)
 
+	def __contains__(self, entity):
+		return entity in self.entities
+
 	def cleanup(self):
-		to_remove = []
-		for i in self.entities:
-			if not i.alive:
-				to_remove.append(i)
-		for i in to_remove:
-			self.entities.remove(i)
+		""" Finishes any removals that were deferred while the filter was being iterated over. """
+		if self.deferred and not self.iterating:
+			for i in self.deferred:
+				self.entities.discard(i)
+			self.deferred = []
 
 	def __iter__(self):
-		self.cleanup()
-		for i in self.entities:
-			yield i
+		self.iterating += 1
+		try:
+			if self.archetypes is None:
+				yield from self.entities
+			else:
+				yield from self.archetypes.iterate(self.query)
+		finally:
+			self.iterating -= 1
+			self.cleanup()
 
 	def active(self):
-		self.cleanup()
-		for i in self.entities:
+		for i in self:
 			if not i.paused:
 				yield i
 
@@ -179,9 +357,171 @@ class Sorter:
 		self.contents[key].add(entity)
 
 	def remove(self, entity):
-		key = self.func(entity)
-		self.contents[key].discard(entity)
+		group = self.contents.get(self.func(entity))
+		if group is not None:
+			group.discard(entity)
 
 	def __getitem__(self, key):
-		self.contents[key] = set(filter(lambda e: e.alive, self.contents[key]))
 		return self.contents[key]
+
+
+def compile_query(rules):
+	""" Compiles rules that may be chained with ``>`` into a single pair of masks. """
+	result = _queries.get(rules)
+	if result is None:
+		required = 0
+		excluded = 0
+		for i in rules.split('>'):
+			r, e = compile_rules(i)
+			required |= r
+			excluded |= e
+		result = _queries[rules] = (required, excluded)
+	return result
+
+
+class Archetype:
+	""" The entities that share a mask, which is to say the same components and tags.
+
+		Components are stored in columns, one for each component name, that line up
+		with the list of entities. Columns are built the first time they are asked for.
+	"""
+
+	def __init__(self, mask):
+		self.mask = mask
+		self.entities = []
+		self.index = {}
+		self.columns = {}
+
+	def __len__(self):
+		return len(self.entities)
+
+	def column(self, name):
+		""" Returns the list of components with the given name, in the same order as the entities. """
+		result = self.columns.get(name)
+		if result is None:
+			result = self.columns[name] = [i[name] for i in self.entities]
+		return result
+
+	def add(self, entity):
+		if entity not in self.index:
+			self.index[entity] = len(self.entities)
+			self.entities.append(entity)
+			for name, column in self.columns.items():
+				column.append(entity[name])
+
+	def discard(self, entity):
+		i = self.index.pop(entity, None)
+		if i is not None:
+			# Move the last row into the hole
+			last = self.entities.pop()
+			if last is not entity:
+				self.entities[i] = last
+				self.index[last] = i
+			for column in self.columns.values():
+				value = column.pop()
+				if last is not entity:
+					column[i] = value
+
+
+class ArchetypeIndex:
+	""" Stores entities in archetypes, grouped by their components and tags.
+
+		A query returns the archetypes that match some rules, so iterating over it
+		walks a few dense lists rather than checking every entity. The list of archetypes
+		that match a query is kept up to date as new archetypes appear.
+
+		This can be piped from a :class:`Filter`. As with filters, removals made while
+		a query is being iterated over are deferred until the iteration ends.
+	"""
+
+	def __init__(self):
+		self.archetypes = {}
+		self.queries = {}
+		self.membership = {}
+		self.hash = id(self)
+		self.iterating = 0
+		self.deferred = []
+
+	def __len__(self):
+		return len(self.membership)
+
+	def __contains__(self, entity):
+		return entity in self.membership
+
+	def insert(self, entity):
+		if entity in self.membership:
+			return
+		mask = entity._ff_mask
+		archetype = self.archetypes.get(mask)
+		if archetype is None:
+			archetype = self.archetypes[mask] = Archetype(mask)
+			for (required, excluded), matches in self.queries.items():
+				if mask & required == required and not mask & excluded:
+					matches.append(archetype)
+		archetype.add(entity)
+		self.membership[entity] = archetype
+
+	def remove(self, entity):
+		if entity in self.membership:
+			if self.iterating:
+				self.deferred.append(entity)
+			else:
+				self.membership.pop(entity).discard(entity)
+
+	def cleanup(self):
+		""" Finishes any removals that were deferred while a query was being iterated over. """
+		if self.deferred and not self.iterating:
+			for i in self.deferred:
+				archetype = self.membership.pop(i, None)
+				if archetype is not None:
+					archetype.discard(i)
+			self.deferred = []
+
+	def query(self, rules):
+		""" Returns the list of archetypes that match the rules.
+
+			:Parameters:
+				`rules` : string
+					Filter rules, which may be chained with ``>``.
+		"""
+		return self.matching(compile_query(rules.replace(' ', '')))
+
+	def matching(self, query):
+		""" Returns the list of archetypes that match a compiled query, a pair of ``(required, excluded)`` masks. """
+		matches = self.queries.get(query)
+		if matches is None:
+			required, excluded = query
+			matches = self.queries[query] = [
+				i for i in self.archetypes.values()
+				if i.mask & required == required and not i.mask & excluded
+			]
+		return matches
+
+	def iterate(self, query):
+		""" Iterates over the entities in the archetypes that match a compiled query. """
+		self.iterating += 1
+		try:
+			for archetype in self.matching(query):
+				yield from archetype.entities
+		finally:
+			self.iterating -= 1
+			self.cleanup()
+
+	def blocks(self, rules, *names):
+		""" Iterates over the non-empty archetypes that match the rules.
+
+			Yields a tuple for each archetype, holding its list of entities followed
+			by the column of each of the component ``names``.
+		"""
+		self.iterating += 1
+		try:
+			for archetype in self.query(rules):
+				if archetype.entities:
+					yield (archetype.entities,) + tuple(archetype.column(i) for i in names)
+		finally:
+			self.iterating -= 1
+			self.cleanup()
+
+	def entities(self, rules):
+		""" Iterates over the entities that match the rules. """
+		return self.iterate(compile_query(rules.replace(' ', '')))
@@ -20,7 +20,7 @@ def load(name):
 		:Parameters:
 			`name`: string
 				The name of the engine.
-				Currently, only the ``'pyglet'`` engine is valid.
+				Either ``'pyglet'``, or ``'headless'`` to run without a window.
 	"""
 	global current
 	assert(current == None)
@@ -28,8 +28,11 @@ def load(name):
 	if name == 'pyglet':
 		import fireform.engine.pyglet
 		current = fireform.engine.pyglet
+	elif name == 'headless':
+		import fireform.engine.headless
+		current = fireform.engine.headless
 	elif name == 'sdl2':
-		import fireform.engine.sdl2
-		current = fireform.engine.sld2
+		# fireform.engine.sdl is still empty
+		raise NotImplementedError('The sdl2 engine has not been written yet')
 	else:
 		raise ValueError('No engine with name ' + name)
@@ -0,0 +1,335 @@
+"""
+
+	An engine that runs without a window, for servers, tests and benchmarks.
+
+	Nothing is drawn or played. Sprites, text and the camera remember what they
+	were set to, so that they can be checked, and the number of draw calls
+	is counted in ``calls``. The game loop runs ticks one after another as fast
+	as possible, rather than waiting for real time to pass.
+
+	Example::
+
+		fireform.engine.load('headless')
+		fireform.main.run(world, ticks = 1000)
+
+"""
+
+import collections
+import struct
+import fireform.message
+
+# Number of times each drawing function has been called
+calls = collections.Counter()
+
+############################################### IMAGES
+
+def png_size(file_obj):
+	"""Reads the width and height from the header of a png file, or returns ``(0, 0)``."""
+	header = file_obj.read(24)
+	if len(header) == 24 and header.startswith(b'\x89PNG\r\n\x1a\n'):
+		return struct.unpack('>II', header[16:24])
+	return 0, 0
+
+
+class image:
+	"""An image that only knows its size.
+
+	``texture`` can be given as a tuple of the width and height."""
+
+	__slots__ = ['size', 'is_smooth', 'anchor_x', 'anchor_y']
+
+	def __init__(self, file_obj = None, texture = None):
+		assert(file_obj or texture)
+		if file_obj:
+			self.size = png_size(file_obj)
+		if texture:
+			self.size = texture
+		self.is_smooth = False
+		self.anchor_x = 0
+		self.anchor_y = 0
+
+	@property
+	def width(self):
+		return self.size[0]
+
+	@property
+	def height(self):
+		return self.size[1]
+
+	def smooth(self, smooth = None):
+		if smooth is not None:
+			self.is_smooth = smooth
+
+	def get_region(self, x, y, w, h):
+		i = image(texture = (w, h))
+		i.smooth(self.is_smooth)
+		return i
+
+
+class image_grid:
+
+	__slots__ = ['frames']
+
+	def __init__(self, image, tiles_x, tiles_y):
+		w = image.width // tiles_x
+		h = image.height // tiles_y
+		# Frames go from the bottom row to the top, like they do in pyglet
+		self.frames = [image.get_region(x * w, y * h, w, h) for y in range(tiles_y) for x in range(tiles_x)]
+
+	def get_strip(self, a, b):
+		return self.frames[a:b]
+
+	def get_frame(self, frame):
+		return self.frames[frame]
+
+
+class sprite:
+
+	__slots__ = ['image', 'x', 'y', 'rotation', 'scale', 'visible', 'opacity', 'crop_box', 'blend', 'batch']
+
+	def __init__(self, img = None, x = 0, y = 0, batch = None, blend = None):
+		self.image = img
+		self.x = x
+		self.y = y
+		self.rotation = 0
+		self.scale = 1
+		self.visible = True
+		self.opacity = 255
+		self.crop_box = None
+		self.blend = blend
+		self.batch = batch
+		if batch is not None:
+			batch.sprites.add(self)
+
+	def flush(self):
+		pass
+
+	def delete(self):
+		if self.batch is not None:
+			self.batch.sprites.discard(self)
+			self.batch = None
+
+
+class batch:
+
+	__slots__ = ['sprites']
+
+	def __init__(self):
+		self.sprites = set()
+
+	def draw(self):
+		calls['batch'] += 1
+
+############################################### SOUND
+
+class sound:
+
+	__slots__ = ['stream']
+
+	def __init__(self, file_object, stream = False):
+		self.stream = stream
+
+
+class sound_player:
+
+	__slots__ = ['sounds', '_volume', 'playing']
+
+	def __init__(self, *sounds, volume = 1.0, paused = False):
+		self.sounds = list(sounds)
+		self.volume = volume
+		self.playing = not paused
+
+	@property
+	def volume(self):
+		return self._volume
+
+	@volume.setter
+	def volume(self, value):
+		self._volume = max(0, min(1, value))
+
+	def play(self):
+		self.playing = True
+
+	def pause(self):
+		self.playing = False
+
+############################################### TEXT LABELS
+
+class text:
+
+	def __init__(self, **options):
+		self.opts = options.copy()
+
+	@property
+	def text(self):
+		return self.opts.get('text', '')
+
+	@text.setter
+	def text(self, value):
+		self.opts['text'] = value
+
+	@property
+	def x(self):
+		return self.opts.get('x', '')
+
+	@x.setter
+	def x(self, value):
+		self.opts['x'] = value
+
+	@property
+	def y(self):
+		return self.opts.get('y', '')
+
+	@y.setter
+	def y(self, value):
+		self.opts['y'] = value
+
+	def draw(self):
+		calls['text'] += 1
+
+############################################### DRAWING FUNCTIONS
+
+colour = (1, 1, 1, 1)
+clear_colour = (1, 1, 1, 1)
+blend_mode = None
+
+def draw_set_colour(new_colour):
+	global colour
+	colour = new_colour
+
+def draw_lines(lines):
+	calls['lines'] += 1
+
+def draw_text(**options):
+	calls['text'] += 1
+
+def set_clear_colour(new_colour):
+	global clear_colour
+	clear_colour = new_colour
+
+def set_blend_mode(mode):
+	global blend_mode
+	blend_mode = mode
+
+############################################### CAMERA MANIPULATION
+
+# The position and zoom given to camera_apply, or None
+camera = None
+
+def camera_apply(centre_x, centre_y, zoom):
+	global camera
+	camera = (centre_x, centre_y, zoom)
+
+def camera_dispel():
+	global camera
+	camera = None
+
+############################################### MAIN LOOP STUFF
+
+w_window_width = 1280
+w_window_height = 800
+
+mouse_raw_x = 0
+mouse_raw_y = 0
+
+world = None
+running = False
+
+def get_mouse_position(world):
+	"""Not to be used by mortals."""
+	cam_sys = world.systems_by_name.get('fireform.system.camera', None)
+	return (0, 0) if cam_sys == None else (cam_sys.cam_x, cam_sys.cam_y)
+
+def get_camera_zoom(world):
+	"""Not to be used by mortals."""
+	cam_sys = world.systems_by_name.get('fireform.system.camera', None)
+	return 1 if cam_sys == None else cam_sys.scale
+
+def default_draw_handler(world):
+	world.handle_message(fireform.message.draw('default'))
+
+def translate_cursor(x, y):
+	cx, cy = get_mouse_position(world)
+	scale = 1 / get_camera_zoom(world)
+	x = (x - w_window_width // 2) * scale + cx
+	y = (y - w_window_height // 2) * scale + cy
+	return (x, y)
+
+def run(the_world, **kwargs):
+	"""Run the game without a window.
+
+	Ticks are run one after another, without waiting, and the same messages are
+	sent in the same order every time, so a run can be repeated exactly.
+	Each frame that is drawn is given an :class:`fireform.message.interpolate`
+	with an ``alpha`` of 1, as there is never any time left over between ticks.
+	Returns the number of ticks that were run.
+
+	:Parameters:
+		`ticks` : int
+			The number of ticks to run. If not given, the game runs until :func:`stop` is called.
+		`draw_rate` : int
+			The world is drawn once every this many ticks.
+			A value of ``0`` means that the world is never drawn. Defaults to ``1``.
+		`window_width` : int
+			The width of the pretend window. Defaults to 1280.
+		`window_height` : int
+			The height of the pretend window. Defaults to 800.
+		`draw_handler` : callable
+			Experimental.
+
+	Other arguments that are given to the pyglet engine are accepted and ignored.
+	"""
+
+	global w_window_width
+	global w_window_height
+	global world
+	global running
+
+	world = the_world
+	w_window_width = kwargs.get('window_width', 1280)
+	w_window_height = kwargs.get('window_height', 800)
+	set_clear_colour(kwargs.get('clear_colour', (1, 1, 1, 1)))
+
+	ticks = kwargs.get('ticks')
+	draw_rate = kwargs.get('draw_rate', 1)
+	draw_handler = kwargs.get('draw_handler', default_draw_handler)
+
+	world.handle_message(fireform.message.window_resized(w_window_width, w_window_height))
+
+	running = True
+	count = 0
+	while running and (ticks is None or count < ticks):
+		# The world may be swapped by a message handler, so it is looked up each time
+		world.refresh_entities()
+		world.handle_message(fireform.message.mouse_move_raw(mouse_raw_x, mouse_raw_y))
+		world.handle_message(fireform.message.mouse_move(*translate_cursor(mouse_raw_x, mouse_raw_y)))
+		world.handle_message(fireform.message.tick())
+		world.handle_message(fireform.message.animate())
+		count += 1
+		if draw_rate and count % draw_rate == 0:
+			# Ticks are not run against real time, so each frame is drawn right on the last one
+			world.handle_message(fireform.message.interpolate(1.0))
+			draw_handler(world)
+	running = False
+	return count
+
+def stop():
+	"""Stops the game loop at the end of the current tick."""
+	global running
+	running = False
+
+def swap_world(new_world):
+	global world
+	old_world = world
+	world = new_world
+	new_world.post_message(fireform.message.window_resized(
+		w_window_width,
+		w_window_height
+	))
+	return old_world
+
+def get_window_width():
+	return w_window_width
+
+def get_window_height():
+	return w_window_height
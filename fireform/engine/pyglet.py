@@ -1,6 +1,7 @@
 import pyglet
 import pyglet.image
 import fireform.message
+import fireform.util.clock
 import warnings
 import time
 import io
@@ -1085,33 +1086,39 @@ def run(the_world, **kwargs):
 
 	TARGET_TICKS = kwargs.get('ticks_per_second', 60)
 	DRAW_EVERY = kwargs.get('draw_rate', 1)
-	INTERVAL = 1 / TARGET_TICKS
+	# Frames are drawn at their own rate, which by default matches the old behaviour
+	# of drawing once every draw_rate ticks.
+	TARGET_FRAMES = kwargs.get('frames_per_second', TARGET_TICKS / DRAW_EVERY)
+	stepper = fireform.util.clock.fixed_step(TARGET_TICKS, kwargs.get('max_steps', 5))
 
 	draw_handler = kwargs.get('draw_handler', default_draw_handler)
 	fps_display = None
 
-	def update(delta_time):
-		# if delta_time > INTERVAL or True:
-		# 	print('update(', delta_time, ')')
+	def tick():
 		world.refresh_entities()
 		world.handle_message(fireform.message.mouse_move_raw(mouse_raw_x, mouse_raw_y))
 		world.handle_message(fireform.message.mouse_move(*translate_cursor(mouse_raw_x, mouse_raw_y)))
 		world.handle_message(fireform.message.tick())
 		world.handle_message(fireform.message.animate())
 		update.tick_counter += 1
-		if update.tick_counter % DRAW_EVERY == 0:
-			game_window.clear()
-			# world.handle_message(fireform.message.draw())
-			draw_handler(world)
-			if fps_display:
-				fps_display.draw()
-			game_window.flip()
+
+	def update(delta_time):
+		# Run as many ticks as have fallen due, so that slow frames
+		# do not slow down the game.
+		for i in range(stepper.advance(delta_time)):
+			tick()
+		game_window.clear()
+		world.handle_message(fireform.message.interpolate(stepper.alpha))
+		draw_handler(world)
+		if fps_display:
+			fps_display.draw()
+		game_window.flip()
 
 	update.tick_counter = 0
 
 	if kwargs.get('show_fps', True):
 		fps_display = pyglet.window.FPSDisplay(game_window)
-	pyglet.clock.schedule_interval_soft(update, INTERVAL)
+	pyglet.clock.schedule_interval_soft(update, 1 / TARGET_FRAMES)
 	# pyglet.clock.set_fps_limit(TARGET_FPS) # This was depreciated. No longer using it.
 	pyglet.app.run()
 
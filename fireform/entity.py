@@ -1,6 +1,8 @@
 import copy
+import os
 import fireform.behaviour
 import fireform.data
+import fireform.efilter
 import warnings
 
 class DuplicateComponentException(Exception):
@@ -23,8 +25,20 @@ class entity:
 	This class should not be inherited from (because that's not how things work).
 
 	An entities' attibutes and behaviours are defined by the 'blobs' that they are made from.
+
+	When debugging is turned off, with ``fireform.configure(debug = False)`` or by setting
+	the ``FIREFORM_DEBUG`` environment variable to ``0``, new entities are made
+	as :class:`release_entity` instead, which skips the checks made in debugging.
 	"""
 
+	# Whether new entities check for mistakes. See fireform.configure.
+	debug = os.environ.get('FIREFORM_DEBUG', '1') != '0'
+
+	def __new__(cls, *contents, **kwargs):
+		if cls is entity and not entity.debug:
+			cls = release_entity
+		return object.__new__(cls)
+
 	def __init__(self, *contents, ordering = 0, tags = set()):
 		"""
 
@@ -34,6 +48,7 @@ class entity:
 			`ordering` : int
 				The entity's "priority" in the world ordering list.
 				A smaller number means it receives messages earlier.
+				This is read when the entity is added to a world.
 				Defaults to 0.
 			`tags` : iterable of strings
 				String 'tags' to be associated with the entity.
@@ -45,8 +60,14 @@ class entity:
 		self.behaviours = {}
 		self.behaviours_list = []
 		self.alive = True
+		# Called with the entity when it is killed
+		self.kill_hooks = []
+		# The pool that recycles the entity, if it has one
+		self._ff_pool = None
 		self.ordering = ordering
 		self.tags = set(tags.split(' ')) if type(tags) is str else set(tags)
+		# Bits of the component names and tags, used by filters
+		self._ff_mask = fireform.efilter.tag_mask(self.tags)
 		for i in contents:
 			self.attach(i)
 
@@ -61,7 +82,8 @@ class entity:
 
 	def __setattr__(self, name, value):
 		""" This should only be in here during debugging.
-			Released games should not have this for performance reasons.
+			Released games should not have this for performance reasons,
+			and can turn debugging off to use :class:`release_entity` instead.
 		"""
 		if isinstance(self.__dict__.get(name), fireform.data.base) and self.__dict__.get(name) != value:
 			warnings.warn('Assignment to ' + name + ' overrides datum component. Perhaps you meant to use "<<=" instead of "=".', stacklevel = 2)
@@ -101,7 +123,10 @@ class entity:
 			raise SharedComponentException()
 		c._ff__used = True
 		# Register it
-		self.contents[c.decipher_name()] = c
+		name = c.decipher_name()
+		self.contents[name] = c
+		if isinstance(name, str):
+			self._ff_mask |= fireform.efilter.bit(name)
 		self.contents[type(c)] = c
 		if isinstance(c, fireform.data.base):
 			if c.has_name():
@@ -135,6 +160,18 @@ class entity:
 			self.alive = False
 			for k, v in self.behaviours.items():
 				v.kill()
+			for hook in self.kill_hooks:
+				hook(self)
+
+	def revive(self):
+		"""Bring a dead entity back to life, so that it can be added to a world again.
+
+		This is used by :class:`fireform.system.pool`, once the world has finished removing the entity.
+		"""
+		self.alive = True
+		self.kill_hooks = []
+		for i in self.behaviours_list:
+			i.__dict__.pop('_dead', None)
 
 	def __str__(self):
 		"""Information on the entity
@@ -155,6 +192,21 @@ class entity:
 			s += '    tags: ' + ', '.join(self.tags) + '\n'
 		return s
 
+class release_entity(entity):
+	"""An entity without the debugging checks.
+
+	The fixed attributes are kept in slots, and assigning to attributes is not
+	checked for accidentally replacing components. Components are still available
+	as attributes, such as ``entity.box``.
+	"""
+
+	__slots__ = [
+		'contents', 'datum', 'behaviours', 'behaviours_list', 'alive', 'kill_hooks',
+		'_ff_pool', 'ordering', 'tags', '_ff_mask', '_ff_order'
+	]
+
+	__setattr__ = object.__setattr__
+
 # Compatibility shim, need to prevent sphinx from recursing into
 # a stack overflow
 if 'sphinx' not in __import__('sys').modules:
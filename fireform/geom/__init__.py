@@ -1,3 +1,4 @@
+import math
 from copy import copy, deepcopy
 
 
@@ -138,7 +139,7 @@ class line:
 		if s == self.p: return 0
 		if s == self.r: return 1
 		d = self.r - self.p
-		return ((s.x - self.p.x) * d.x + (s.y - self.p.y) * d.y) / d.magnitude()
+		return ((s.x - self.p.x) * d.x + (s.y - self.p.y) * d.y) / (d.x * d.x + d.y * d.y)
 
 	def project(self, s):
 		if s == self.p or self == self.r: return copy(s)
@@ -174,3 +175,164 @@ def vectorify(k):
 
 def box_overlap(a, b):
 	return a.left < b.right and b.left < a.right and a.bottom < b.top and b.bottom < a.top
+
+
+# The segment functions below take plain numbers rather than vectors,
+# so that they can be used in tight loops without allocating anything.
+
+
+def segment_distance_squared(x1, y1, x2, y2, px, py):
+	""" The squared distance from the point (px, py) to the segment between (x1, y1) and (x2, y2). """
+	dx = x2 - x1
+	dy = y2 - y1
+	length = dx * dx + dy * dy
+	t = 0
+	if length > 0:
+		t = ((px - x1) * dx + (py - y1) * dy) / length
+		t = min(max(t, 0), 1)
+	ox = x1 + dx * t - px
+	oy = y1 + dy * t - py
+	return ox * ox + oy * oy
+
+
+def segment_rectangle_overlap(x1, y1, x2, y2, left, bottom, right, top):
+	""" Returns true iff the segment between (x1, y1) and (x2, y2) passes through the inside of the rectangle.
+
+		A segment that only touches the edge of the rectangle does not count, which matches :func:`box_overlap`.
+	"""
+	if max(x1, x2) <= left or min(x1, x2) >= right or max(y1, y2) <= bottom or min(y1, y2) >= top:
+		return False
+	# The segment's bounds overlap the rectangle, so it passes through the inside
+	# unless all four corners are on the same side of the line.
+	dx = x2 - x1
+	dy = y2 - y1
+	c1 = dx * (bottom - y1) - dy * (left - x1)
+	c2 = dx * (bottom - y1) - dy * (right - x1)
+	c3 = dx * (top - y1) - dy * (left - x1)
+	c4 = dx * (top - y1) - dy * (right - x1)
+	if c1 >= 0 and c2 >= 0 and c3 >= 0 and c4 >= 0:
+		return False
+	if c1 <= 0 and c2 <= 0 and c3 <= 0 and c4 <= 0:
+		return False
+	return True
+
+
+def segment_segment_overlap(ax, ay, bx, by, cx, cy, dx, dy):
+	""" Returns true iff the segment from (ax, ay) to (bx, by) crosses the segment from (cx, cy) to (dx, dy).
+
+		Segments that only touch at an end do not count. Segments that lie along the same line count
+		if they share more than a single point.
+	"""
+	abx = bx - ax
+	aby = by - ay
+	cdx = dx - cx
+	cdy = dy - cy
+	# Which side of each segment the ends of the other one are on
+	d1 = cdx * (ay - cy) - cdy * (ax - cx)
+	d2 = cdx * (by - cy) - cdy * (bx - cx)
+	d3 = abx * (cy - ay) - aby * (cx - ax)
+	d4 = abx * (dy - ay) - aby * (dx - ax)
+	if ((d1 > 0 and d2 < 0) or (d1 < 0 and d2 > 0)) and ((d3 > 0 and d4 < 0) or (d3 < 0 and d4 > 0)):
+		return True
+	if d1 == 0 and d2 == 0 and d3 == 0 and d4 == 0:
+		# Collinear, so compare them along whichever axis they extend further
+		if abs(abx) + abs(cdx) >= abs(aby) + abs(cdy):
+			return max(ax, bx) > min(cx, dx) and max(cx, dx) > min(ax, bx)
+		return max(ay, by) > min(cy, dy) and max(cy, dy) > min(ay, by)
+	return False
+
+
+def segment_circle_time(x, y, dx, dy, cx, cy, r):
+	""" Finds when a point moving from (x, y) by (dx, dy) enters a circle.
+
+		Returns ``None`` if it does not enter the circle between the times 0 and 1,
+		or if it only touches the edge. If the point starts inside the circle, the time is 0.
+	"""
+	fx = x - cx
+	fy = y - cy
+	c = fx * fx + fy * fy - r * r
+	if c < 0:
+		return 0
+	a = dx * dx + dy * dy
+	if a == 0:
+		return None
+	b = fx * dx + fy * dy
+	disc = b * b - a * c
+	if disc <= 0:
+		return None
+	t = (-b - math.sqrt(disc)) / a
+	if 0 <= t <= 1:
+		return t
+	return None
+
+
+def segment_segment_time(x, y, dx, dy, ax, ay, bx, by):
+	""" Finds when a point moving from (x, y) by (dx, dy) crosses the segment from (ax, ay) to (bx, by).
+
+		Returns ``None`` if it does not cross between the times 0 and 1. A point that moves
+		along the same line as the segment is not counted as crossing it.
+	"""
+	ex = bx - ax
+	ey = by - ay
+	denom = dx * ey - dy * ex
+	if denom == 0:
+		return None
+	ox = ax - x
+	oy = ay - y
+	t = (ox * ey - oy * ex) / denom
+	u = (ox * dy - oy * dx) / denom
+	if 0 <= t <= 1 and 0 <= u <= 1:
+		return t
+	return None
+
+
+def swept_box_time(a_left, a_bottom, a_right, a_top, vx, vy, b_left, b_bottom, b_right, b_top):
+	""" Finds when a moving box first overlaps a still one.
+
+		The first box moves by (vx, vy) over the period of time from 0 to 1.
+		To test two moving boxes, give the velocity of the first relative to the second.
+
+		Returns ``None`` if they do not overlap during that time. Otherwise returns a tuple
+		of the time of impact, and the x and y of the normal of the face that was hit, which
+		points towards the first box. If the boxes already overlap, the time is 0 and the
+		normal points along the direction that would separate them the quickest.
+	"""
+	inf = float('inf')
+	if vx > 0:
+		x_entry = (b_left - a_right) / vx
+		x_exit = (b_right - a_left) / vx
+	elif vx < 0:
+		x_entry = (b_right - a_left) / vx
+		x_exit = (b_left - a_right) / vx
+	elif a_right > b_left and b_right > a_left:
+		x_entry = -inf
+		x_exit = inf
+	else:
+		return None
+	if vy > 0:
+		y_entry = (b_bottom - a_top) / vy
+		y_exit = (b_top - a_bottom) / vy
+	elif vy < 0:
+		y_entry = (b_top - a_bottom) / vy
+		y_exit = (b_bottom - a_top) / vy
+	elif a_top > b_bottom and b_top > a_bottom:
+		y_entry = -inf
+		y_exit = inf
+	else:
+		return None
+	entry = max(x_entry, y_entry)
+	exit = min(x_exit, y_exit)
+	if entry >= exit or entry >= 1 or exit <= 0:
+		return None
+	if entry >= 0:
+		if x_entry > y_entry:
+			return entry, (-1 if vx > 0 else 1), 0
+		return entry, 0, (-1 if vy > 0 else 1)
+	# Already overlapping, so push out along the shallowest side
+	depth, nx, ny = min(
+		(a_right - b_left, -1, 0),
+		(b_right - a_left, 1, 0),
+		(a_top - b_bottom, 0, -1),
+		(b_top - a_bottom, 0, 1)
+	)
+	return 0, nx, ny
@@ -36,7 +36,17 @@ def run(*args, **kwargs):
 			A value of ``1`` will redraw it every tick.
 			A value of ``2`` will redraw it every second tick.
 			etc...
-			Defaults to ``1``.
+			Defaults to ``1``. Ignored if ``frames_per_second`` is given.
+		`frames_per_second` : float
+			The number of times the screen is drawn every second, separately
+			from the ticks. Ticks are run to catch up with the time that has
+			passed before each frame is drawn, and a :class:`fireform.message.interpolate`
+			message is sent so that things can be drawn between ticks.
+			Defaults to ``ticks_per_second / draw_rate``.
+		`max_steps` : int
+			The most ticks that are run before a single frame is drawn.
+			If the game falls further behind than this, it slows down instead.
+			Defaults to 5.
 		`borderless` : bool
 			Creates a borderless window.
 			Defaults to false.
@@ -49,19 +59,25 @@ def run(*args, **kwargs):
 			Defaults to False.
 		`draw_handler` : callable
 			Experimental.
+		`ticks` : int
+			Only used by the headless engine, which runs this many ticks as fast as
+			it can and then returns. If not given, it runs until :func:`stop` is called.
 
 	"""
-	fireform.engine.current.run(*args, **kwargs)
+	return fireform.engine.current.run(*args, **kwargs)
 
 def stop():
 	"""
 	Stops the main game loop.
 
 	.. warning::
-		Not Implemented
+		Only implemented by the headless engine.
 
 	"""
-	raise NotImplementedError()
+	stop = getattr(fireform.engine.current, 'stop', None)
+	if stop is None:
+		raise NotImplementedError()
+	stop()
 
 def swap_world(new_world):
 	return fireform.engine.current.swap_world(new_world)
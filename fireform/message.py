@@ -7,6 +7,21 @@
 import warnings
 
 
+# Registry of message names.
+# Each name gets a small integer id the first time it is seen.
+_type_ids = {}
+type_names = []
+
+
+def type_id(name):
+	""" Returns the integer id of a message name, registering the name if it is new. """
+	result = _type_ids.get(name)
+	if result is None:
+		result = _type_ids[name] = len(type_names)
+		type_names.append(name)
+	return result
+
+
 def surpass_frozen(function):
 	""" Decorator to apply to a message handler if it should be called even if the world is frozen. """
 	function._surpass_frozen = True
@@ -21,12 +36,29 @@ class base():
 				The name of the message. Behaviour and systems that want to listen for a message
 				have to implement a function called ``m_name``. For example, if the message's name
 				was ``tick``, the behaviour would have to implement ``m_tick``.
+			`type_id` : int
+				The registered id of the message's name. This is set automatically
+				for classes that give ``name`` as a string.
+			`handler_name` : string
+				The name of the function that handles the message, such as ``m_tick``.
 
 	"""
 
 	# This should be overridden by any class that inherits from this.
 	name = lambda self: self.__class__.__name__
 
+	type_id = None
+	handler_name = None
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		if isinstance(cls.name, str):
+			cls.type_id = type_id(cls.name)
+			cls.handler_name = 'm_' + cls.name
+		else:
+			cls.type_id = None
+			cls.handler_name = None
+
 	# def name(self):
 	# 	"""Returns the name of the message.
 	#
@@ -48,6 +80,12 @@ class base():
 			warnings.warn('Message type "{}" is using a function to implement its name'.format(n), DeprecationWarning)
 			return n
 
+	def decipher_type_id(self):
+		""" Returns the registered id of the message's name. """
+		if self.type_id is None:
+			return type_id(self.decipher_name())
+		return self.type_id
+
 
 class generic(base):
 	""" Generic messages which hold no data.
@@ -59,23 +97,50 @@ class generic(base):
 
 	def __init__(self, my_name):
 		self.name = my_name
+		self.type_id = type_id(my_name)
+		self.handler_name = 'm_' + my_name
+
+
+# Messages without any data are shared rather than created every tick.
+_tick = generic('tick')
+_animate = generic('animate')
 
 
 def tick():
-	"""This message is dispatched once per game tick."""
-	return generic('tick')
+	"""This message is dispatched once per game tick.
+
+	The same instance is returned on every call."""
+	return _tick
 
 
 def frozen_tick():
 	"""This message is dispatched once per tick while the system is paused."""
-	return generic('tick')
+	return _tick
 
 
 def animate():
 	""" Dispatches once per game tick, after the tick events and before the drae event.
 		It exists to seperate the tick-dependent graphics logic from the tick-independent logic.
+
+		The same instance is returned on every call.
+	"""
+	return _animate
+
+
+class interpolate(base):
+	""" Dispatched before each frame is drawn, by engines that draw at a different rate to the ticks.
+
+		:Attributes:
+			`alpha` : float
+				How far it is from the last tick to the next, from 0 to 1.
+				Things can be drawn this far between where they were
+				on the tick before the last one, and where they are now.
 	"""
-	return generic('animate')
+
+	name = 'interpolate'
+
+	def __init__(self, alpha):
+		self.alpha = alpha
 
 
 class draw(base):
@@ -139,6 +204,24 @@ class new_entity(base):
 		self.entity = entity
 
 
+class new_entities(base):
+	""" Signifies that a batch of entities was added to the world.
+
+		This is sent instead of :class:`new_entity` for entities
+		added with :meth:`fireform.world.world.spawn_batch`.
+
+		:Attributes:
+			`entities` : list
+				The entities that were just added to the world.
+
+	"""
+
+	name = 'new_entities'
+
+	def __init__(self, entities):
+		self.entities = entities
+
+
 class dead_entity(base):
 	"""Signals that an entitity has been killed.
 
@@ -307,7 +390,8 @@ class collision(base):
 		stop colliding.
 
 		This is sent as a private message, so only the entities that actually
-		collide will receive it.
+		collide will receive it. The same message object is reused for each
+		entity, so it should not be kept once the handler has returned.
 
 		:Attributes:
 			`other` : :class:`fireform.entity.entity`
@@ -315,15 +399,23 @@ class collision(base):
 			`direction` : string
 				The direction in which the entities were moving when they collided.
 				This is only applicable when :class:`the collision mode is set to split<fireform.system.motion>`.
+			`time` : float
+				The fraction of the tick's movement at which the entities first touched.
+				This is only applicable when the collision mode is set to swept.
+			`normal` : :class:`fireform.geom.vector`
+				The normal of the other entity's face that was hit, pointing towards this entity.
+				This is only applicable when the collision mode is set to swept.
 	"""
 
 	name = 'collision'
 
-	def __init__(self, first, second, direction):
+	def __init__(self, first, second, direction, time = None, normal = None):
 		self.first = first
 		self.second = second
 		self.other = second # <== You see this? It's the future.
 		self.direction = direction
+		self.time = time
+		self.normal = normal
 
 	def __contains__(self, item):
 		return self.first == item or self.second == item
@@ -372,6 +464,23 @@ class collision_enter(base):
 		return self.first == item or self.second == item
 
 
+class collision_stay(base):
+	""" Signals that two entities are still overlapping, after overlapping on the previous tick.
+
+		This is sent as a private message, so only the entities that actually
+		collide will receive it.
+
+		:Attributes:
+			`other` : :class:`fireform.entity.entity`
+				The *other* entity.
+	"""
+
+	name = 'collision_stay'
+
+	def __init__(self, other):
+		self.other = other
+
+
 class collision_exit(base):
 	""" Signals that two entities have stopped overlapping.
 
@@ -0,0 +1,113 @@
+"""
+
+	Templates for stamping out many entities of the same kind.
+
+	Building an entity normally attaches each component one at a time, working
+	out its names and checking it as it goes. A prefab does that work once, and
+	then fills in new entities directly.
+
+"""
+
+import gc
+
+import fireform.data
+import fireform.entity
+
+
+class prefab:
+	""" A template for entities that have the same components and tags.
+
+		:Parameters:
+			`components` : list
+				Each item describes a component, and is either a component class,
+				or a tuple of a component class and a dictionary of keyword arguments
+				used to construct it. A new component is constructed for every entity.
+			`ordering` : int
+				The ordering of the entities. Defaults to 0.
+			`tags` : iterable of strings
+				Tags given to each entity. Defaults to having no tags.
+
+		Example::
+
+			bullet = fireform.prefab.prefab(
+				(fireform.data.box, {'width': 12, 'height': 12}),
+				fireform.data.velocity,
+				tags = 'bullet'
+			)
+			world.spawn_batch(bullet.stamp(1000))
+
+	"""
+
+	def __init__(self, *components, ordering = 0, tags = set()):
+		self.ordering = ordering
+		self.tags = set(tags.split(' ')) if type(tags) is str else set(tags)
+		self.specs = []
+		for i in components:
+			if isinstance(i, tuple):
+				cls, kwargs = i
+			else:
+				cls, kwargs = i, {}
+			self.specs.append((cls, kwargs))
+		# Build an entity the normal way, both to check the components and to record where they go
+		sample = fireform.entity.entity(*[cls(**kwargs) for cls, kwargs in self.specs], ordering = ordering, tags = self.tags)
+		self.mask = sample._ff_mask
+		self.layout = []
+		for cls, kwargs in self.specs:
+			component = sample.contents[cls]
+			name = component.decipher_name()
+			is_data = isinstance(component, fireform.data.base)
+			has_name = component.has_name()
+			attribute = component.decipher_attribute_name() if is_data else None
+			self.layout.append((cls, kwargs, name, is_data, has_name, attribute))
+
+	def create(self):
+		""" Returns a new entity. """
+		contents = {}
+		datum = {}
+		behaviours = {}
+		behaviours_list = []
+		# This gives a released entity if debugging is turned off
+		result = fireform.entity.entity.__new__(fireform.entity.entity)
+		d = result.__dict__
+		for cls, kwargs, name, is_data, has_name, attribute in self.layout:
+			c = cls(**kwargs)
+			c._ff__used = True
+			contents[name] = c
+			contents[cls] = c
+			if is_data:
+				if has_name:
+					datum[name] = c
+				if attribute:
+					d[attribute] = c
+				datum[cls] = c
+			else:
+				if has_name:
+					behaviours[name] = c
+				behaviours[cls] = c
+				behaviours_list.append(c)
+		# Released entities keep these in slots, so they cannot go straight into the dictionary
+		put = object.__setattr__
+		put(result, 'contents', contents)
+		put(result, 'datum', datum)
+		put(result, 'behaviours', behaviours)
+		put(result, 'behaviours_list', behaviours_list)
+		put(result, 'alive', True)
+		put(result, 'kill_hooks', [])
+		put(result, '_ff_pool', None)
+		put(result, 'ordering', self.ordering)
+		put(result, 'tags', set(self.tags))
+		put(result, '_ff_mask', self.mask)
+		return result
+
+	def stamp(self, count):
+		""" Returns a list of ``count`` new entities. """
+		create = self.create
+		# Nothing made here is garbage, so the collector would only be slowed
+		# down by scanning the new objects over and over as they pile up.
+		enabled = gc.isenabled()
+		gc.disable()
+		try:
+			return [create() for i in range(count)]
+		finally:
+			if enabled:
+				gc.enable()
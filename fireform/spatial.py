@@ -0,0 +1,209 @@
+"""
+
+	Finds entities by where they are.
+
+	The world keeps an :class:`index` of every entity with a box, which is used
+	by :meth:`fireform.world.world.query_rect` and the other spatial queries.
+
+"""
+
+import fireform.efilter
+import fireform.geom
+from fireform.system.broadphase import grid, PARTITION_SIZE
+
+
+def cells_on_segment(x1, y1, x2, y2, size):
+	""" Walks the cells of a grid that a line segment passes through, in order.
+
+		Yields tuples of ``(cell_x, cell_y, time)``, where time is the fraction of the
+		way along the segment at which it leaves the cell.
+	"""
+	inf = float('inf')
+	cx = int(x1 // size)
+	cy = int(y1 // size)
+	end_x = int(x2 // size)
+	end_y = int(y2 // size)
+	dx = x2 - x1
+	dy = y2 - y1
+	if dx > 0:
+		step_x, delta_x, next_x = 1, size / dx, ((cx + 1) * size - x1) / dx
+	elif dx < 0:
+		step_x, delta_x, next_x = -1, -size / dx, (cx * size - x1) / dx
+	else:
+		step_x, delta_x, next_x = 0, inf, inf
+	if dy > 0:
+		step_y, delta_y, next_y = 1, size / dy, ((cy + 1) * size - y1) / dy
+	elif dy < 0:
+		step_y, delta_y, next_y = -1, -size / dy, (cy * size - y1) / dy
+	else:
+		step_y, delta_y, next_y = 0, inf, inf
+	while True:
+		leave = min(next_x, next_y)
+		yield cx, cy, leave
+		# Rounding can carry the walk past the last cell, so the time is checked as well
+		if (cx == end_x and cy == end_y) or leave >= 1:
+			return
+		if next_x < next_y:
+			cx += step_x
+			next_x += delta_x
+		else:
+			cy += step_y
+			next_y += delta_y
+
+
+def bounds(entity):
+	""" Returns the bounds of an entity's box as ``left, bottom, right, top``,
+		swapping the sides of boxes with a negative width or height.
+	"""
+	box = entity.box
+	left = box.left
+	right = box.right
+	bottom = box.bottom
+	top = box.top
+	if right < left:
+		left, right = right, left
+	if top < bottom:
+		bottom, top = top, bottom
+	return left, bottom, right, top
+
+
+class index:
+	""" A grid of the entities with boxes, used to answer spatial queries.
+
+		Boxes are not watched. Instead, the world sets ``dirty`` at the start and
+		end of each tick, and every box is checked by the next query. Boxes that are
+		moved in the middle of a tick can be passed to :meth:`moved` to have them
+		found straight away, which the motion system does for everything it moves.
+		Unlike the collision broadphases, boxes with no size are included.
+
+		This can be piped from a :class:`fireform.efilter.Filter`.
+
+		:Parameters:
+			`cell_size` : float
+				The width and height of each cell. Defaults to 128.
+	"""
+
+	def __init__(self, cell_size = PARTITION_SIZE):
+		self.grid = grid(cell_size)
+		self.entities = set()
+		# Entities whose boxes may have changed since they were put into the grid
+		self.changed = set()
+		self.dirty = False
+		self.hash = id(self)
+
+	def __len__(self):
+		return len(self.entities)
+
+	def insert(self, entity):
+		self.entities.add(entity)
+		self.grid.insert_bounds(entity, *bounds(entity))
+
+	def remove(self, entity):
+		self.entities.discard(entity)
+		self.changed.discard(entity)
+		self.grid.remove(entity)
+
+	def moved(self, entities):
+		""" Records that the boxes of some entities may have changed. """
+		self.changed.update(entities)
+
+	def update(self):
+		""" Moves the entities whose boxes have changed since they were put into the grid.
+
+			Only the entities given to :meth:`moved` are checked, unless the index is ``dirty``.
+		"""
+		proxies = self.grid.proxies
+		entities = self.entities if self.dirty else self.changed & self.entities
+		for entity in entities:
+			proxy = proxies.get(entity)
+			left, bottom, right, top = bounds(entity)
+			if proxy.left != left or proxy.right != right or proxy.bottom != bottom or proxy.top != top:
+				self.grid.remove(entity)
+				self.grid.insert_bounds(entity, left, bottom, right, top)
+		self.changed = set()
+		self.dirty = False
+
+	def sync(self):
+		if self.dirty or self.changed:
+			self.update()
+
+	def query_rect(self, left, bottom, right, top, rules = ''):
+		""" Returns the entities whose boxes overlap a rectangle. Boxes that only touch it are not included. """
+		self.sync()
+		required, excluded = fireform.efilter.compile_query(rules)
+		result = []
+		for p in self.grid.query(left, bottom, right, top):
+			mask = p.entity._ff_mask
+			if mask & required == required and not mask & excluded:
+				result.append(p.entity)
+		return result
+
+	def query_point(self, x, y, rules = ''):
+		""" Returns the entities whose boxes contain a point, including their edges. """
+		self.sync()
+		required, excluded = fireform.efilter.compile_query(rules)
+		size = self.grid.cell_size
+		result = []
+		for p in self.grid.cells.get((int(x // size), int(y // size)), ()):
+			if p.left <= x <= p.right and p.bottom <= y <= p.top:
+				mask = p.entity._ff_mask
+				if mask & required == required and not mask & excluded:
+					result.append(p.entity)
+		return result
+
+	def query_radius(self, x, y, radius, rules = ''):
+		""" Returns the entities whose boxes are within a distance of a point. """
+		self.sync()
+		required, excluded = fireform.efilter.compile_query(rules)
+		limit = radius * radius
+		result = []
+		for p in self.grid.query(x - radius, y - radius, x + radius, y + radius):
+			ox = x - min(max(x, p.left), p.right)
+			oy = y - min(max(y, p.bottom), p.top)
+			if ox * ox + oy * oy <= limit:
+				mask = p.entity._ff_mask
+				if mask & required == required and not mask & excluded:
+					result.append(p.entity)
+		return result
+
+	def raycast(self, x1, y1, x2, y2, rules = '', limit = None, test = None):
+		""" Finds the entities whose boxes are crossed by a line segment.
+
+			Returns a list of ``(entity, time)`` tuples, nearest first, where ``time``
+			is the fraction of the way along the segment at which the box was entered.
+			If the segment starts inside a box, the time is 0.
+
+			:Parameters:
+				`limit` : int
+					The most entities to return. If given, the search stops as soon as
+					that many have been found closer than anything left to check.
+				`test` : callable
+					Called with each entity that is hit and the time its box was entered.
+					Returns the time to use instead, or ``None`` to leave the entity out.
+					The time returned must not be earlier than the one it was given.
+		"""
+		self.sync()
+		required, excluded = fireform.efilter.compile_query(rules)
+		dx = x2 - x1
+		dy = y2 - y1
+		cells = self.grid.cells
+		seen = set()
+		hits = []
+		for cx, cy, leave in cells_on_segment(x1, y1, x2, y2, self.grid.cell_size):
+			for p in cells.get((cx, cy), ()):
+				if p not in seen:
+					seen.add(p)
+					mask = p.entity._ff_mask
+					if mask & required == required and not mask & excluded:
+						hit = fireform.geom.swept_box_time(x1, y1, x1, y1, dx, dy, p.left, p.bottom, p.right, p.top)
+						if hit is not None:
+							time = hit[0] if test is None else test(p.entity, hit[0])
+							if time is not None:
+								hits.append((time, id(p), p.entity))
+			# Anything in later cells is further away than what has been found in this one
+			if limit is not None and sum(1 for i in hits if i[0] <= leave) >= limit:
+				break
+		hits.sort()
+		if limit is not None:
+			hits = hits[:limit]
+		return [(entity, time) for time, key, entity in hits]
@@ -3,3 +3,4 @@ from fireform.system.image import *
 from fireform.system.motion import *
 from fireform.system.debug import *
 from fireform.system.camera import *
+from fireform.system.pool import *
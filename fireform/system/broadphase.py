@@ -0,0 +1,373 @@
+"""
+
+	Broadphase structures used by the motion system to find pairs of
+	entities that might be colliding.
+
+"""
+
+import collections
+import itertools
+
+
+PARTITION_SIZE = 128
+
+
+def swept_bounds(entity, left, bottom, right, top):
+	""" Stretches bounds to cover where the entity will move this tick. """
+	velocity = entity['velocity']
+	if velocity is not None:
+		vx = velocity.x
+		vy = velocity.y
+		if vx > 0:
+			right += vx
+		else:
+			left += vx
+		if vy > 0:
+			top += vy
+		else:
+			bottom += vy
+	return left, bottom, right, top
+
+
+class _proxy:
+	""" The broadphase's record of a single entity. """
+
+	__slots__ = [
+		'entity', 'left', 'right', 'bottom', 'top', 'part_lo', 'part_hi',
+		'extrovert', 'stamp', 'push', 'pop', 'cells'
+	]
+
+	def __init__(self, entity):
+		self.entity = entity
+		self.stamp = -1
+
+
+class sweep:
+	""" Sweep and prune over the x axis, with the y axis split into partitions.
+
+		The list of endpoints is kept between ticks. Since most entities only
+		move a little each tick, the list is nearly sorted when it is re-sorted,
+		which the builtin sort handles in close to linear time.
+
+		Endpoints are lists of ``[x, kind, sequence, proxy]``. Pops have a kind of 0
+		and pushes have a kind of 1, so that boxes which are only touching are
+		not reported. The sequence number is unique, so entities are never compared.
+
+		:Parameters:
+			`partition_size` : float
+				The height of each partition on the y axis.
+	"""
+
+	def __init__(self, partition_size = PARTITION_SIZE):
+		self.partition_size = partition_size
+		self.endpoints = []
+		self.proxies = {}
+		self.sequence = itertools.count()
+		self.stamp = 0
+
+	def __len__(self):
+		return len(self.proxies)
+
+	def update(self, entities, extrovert, swept = False):
+		""" Synchronise the broadphase with the given entities.
+
+			Entities that are not given are removed, as are entities with
+			degenerate boxes.
+
+			:Parameters:
+				`entities` : iterable
+					The entities that should be in the broadphase.
+				`extrovert` : callable
+					Returns whether an entity is extroverted.
+				`swept` : bool
+					If true, each box is stretched to cover the area
+					it will pass through this tick due to its velocity.
+		"""
+		self.stamp += 1
+		stamp = self.stamp
+		proxies = self.proxies
+		size = self.partition_size
+		added = []
+		seen = 0
+		for entity in entities:
+			box = entity.box
+			left = box.left
+			right = box.right
+			bottom = box.bottom
+			top = box.top
+			if right <= left or top <= bottom:
+				continue
+			if swept:
+				left, bottom, right, top = swept_bounds(entity, left, bottom, right, top)
+			proxy = proxies.get(entity)
+			if proxy is None:
+				proxy = proxies[entity] = _proxy(entity)
+				proxy.push = [left, 1, next(self.sequence), proxy]
+				proxy.pop = [right, 0, next(self.sequence), proxy]
+				added.append(proxy.push)
+				added.append(proxy.pop)
+			else:
+				proxy.push[0] = left
+				proxy.pop[0] = right
+			proxy.bottom = bottom
+			proxy.top = top
+			proxy.part_lo = int(bottom // size)
+			proxy.part_hi = int(top // size) + 1
+			proxy.extrovert = extrovert(entity)
+			proxy.stamp = stamp
+			seen += 1
+		if seen != len(proxies):
+			stale = [e for e, p in proxies.items() if p.stamp != stamp]
+			for entity in stale:
+				del proxies[entity]
+			self.endpoints = [i for i in self.endpoints if i[3].stamp == stamp]
+		if added:
+			self.endpoints += added
+		self.endpoints.sort()
+
+	def find_pairs(self, pairs, stats):
+		""" Finds the overlapping boxes.
+
+			:Parameters:
+				`pairs` : set
+					Overlapping pairs of entities are added to this.
+				`stats` : dict
+					The ``'comparisons'`` and ``'queries'`` entries are incremented.
+		"""
+		comparisons = 0
+		queries = 0
+		active = collections.defaultdict(set)
+		extrov = collections.defaultdict(set)
+		for place, kind, seq, proxy in self.endpoints:
+			lo = proxy.part_lo
+			hi = proxy.part_hi
+			if kind == 0:
+				# Only count these things once
+				queries += hi - lo
+				target = extrov if proxy.extrovert else active
+				for i in range(lo, hi):
+					target[i].discard(proxy)
+			else:
+				bottom = proxy.bottom
+				top = proxy.top
+				entity = proxy.entity
+				for i in range(lo, hi):
+					for other in active[i]:
+						comparisons += 1
+						if bottom < other.top and other.bottom < top:
+							pairs.add((entity, other.entity))
+				if proxy.extrovert:
+					for i in range(lo, hi):
+						extrov[i].add(proxy)
+				else:
+					for i in range(lo, hi):
+						for other in extrov[i]:
+							comparisons += 1
+							if bottom < other.top and other.bottom < top:
+								pairs.add((entity, other.entity))
+					for i in range(lo, hi):
+						active[i].add(proxy)
+		stats['comparisons'] += comparisons
+		stats['queries'] += queries
+
+
+class spatial_hash:
+	""" A uniform grid that is rebuilt every tick.
+
+		This works well for large numbers of small entities of a similar size,
+		such as bullets. Entities larger than a cell are placed into every cell
+		that they touch.
+
+		:Parameters:
+			`cell_size` : float
+				The width and height of each cell.
+	"""
+
+	def __init__(self, cell_size = PARTITION_SIZE):
+		self.cell_size = cell_size
+		self.cells = {}
+		self.proxies = {}
+		self.stamp = 0
+
+	def __len__(self):
+		return len(self.proxies)
+
+	def update(self, entities, extrovert, swept = False):
+		""" Rebuild the grid from the given entities.
+
+			:Parameters:
+				`entities` : iterable
+					The entities that should be in the broadphase.
+				`extrovert` : callable
+					Returns whether an entity is extroverted.
+				`swept` : bool
+					If true, each box is stretched to cover the area
+					it will pass through this tick due to its velocity.
+		"""
+		self.stamp += 1
+		stamp = self.stamp
+		proxies = self.proxies
+		size = self.cell_size
+		cells = self.cells = {}
+		seen = 0
+		for entity in entities:
+			box = entity.box
+			left = box.left
+			right = box.right
+			bottom = box.bottom
+			top = box.top
+			if right <= left or top <= bottom:
+				continue
+			if swept:
+				left, bottom, right, top = swept_bounds(entity, left, bottom, right, top)
+			proxy = proxies.get(entity)
+			if proxy is None:
+				proxy = proxies[entity] = _proxy(entity)
+			proxy.left = left
+			proxy.right = right
+			proxy.bottom = bottom
+			proxy.top = top
+			proxy.extrovert = extrovert(entity)
+			proxy.stamp = stamp
+			seen += 1
+			x_lo = int(left // size)
+			x_hi = int(right // size) + 1
+			y_lo = int(bottom // size)
+			y_hi = int(top // size) + 1
+			for x in range(x_lo, x_hi):
+				for y in range(y_lo, y_hi):
+					cell = cells.get((x, y))
+					if cell is None:
+						cells[x, y] = [proxy]
+					else:
+						cell.append(proxy)
+		if seen != len(proxies):
+			stale = [e for e, p in proxies.items() if p.stamp != stamp]
+			for entity in stale:
+				del proxies[entity]
+
+	def find_pairs(self, pairs, stats):
+		""" Finds the overlapping boxes.
+
+			:Parameters:
+				`pairs` : set
+					Overlapping pairs of entities are added to this.
+				`stats` : dict
+					The ``'comparisons'`` and ``'queries'`` entries are incremented.
+		"""
+		comparisons = 0
+		for cell in self.cells.values():
+			n = len(cell)
+			if n > 1:
+				for i in range(n):
+					a = cell[i]
+					left = a.left
+					right = a.right
+					bottom = a.bottom
+					top = a.top
+					ex = a.extrovert
+					for j in range(i + 1, n):
+						b = cell[j]
+						comparisons += 1
+						if b.left < right and left < b.right and b.bottom < top and bottom < b.top:
+							if not (ex and b.extrovert):
+								pairs.add((a.entity, b.entity))
+		stats['comparisons'] += comparisons
+		stats['queries'] += len(self.cells)
+
+
+class grid:
+	""" A uniform grid of cells, used for entities that do not move.
+
+		The bounds of each entity are recorded when it is inserted,
+		so an entity needs to be removed and inserted again if its box changes.
+
+		:Parameters:
+			`cell_size` : float
+				The width and height of each cell.
+	"""
+
+	def __init__(self, cell_size = PARTITION_SIZE):
+		self.cell_size = cell_size
+		self.cells = collections.defaultdict(list)
+		self.proxies = {}
+
+	def __len__(self):
+		return len(self.proxies)
+
+	def __contains__(self, entity):
+		return entity in self.proxies
+
+	def insert(self, entity, extrovert = False):
+		""" Add an entity to the grid. Entities with degenerate boxes are ignored. """
+		if entity in self.proxies:
+			return
+		box = entity.box
+		left = box.left
+		right = box.right
+		bottom = box.bottom
+		top = box.top
+		if right <= left or top <= bottom:
+			return
+		self.insert_bounds(entity, left, bottom, right, top, extrovert)
+
+	def insert_bounds(self, entity, left, bottom, right, top, extrovert = False):
+		""" Add an entity to the grid with the given bounds, rather than those of its box. """
+		proxy = self.proxies[entity] = _proxy(entity)
+		proxy.left = left
+		proxy.right = right
+		proxy.bottom = bottom
+		proxy.top = top
+		proxy.extrovert = extrovert
+		proxy.cells = []
+		size = self.cell_size
+		for x in range(int(left // size), int(right // size) + 1):
+			for y in range(int(bottom // size), int(top // size) + 1):
+				self.cells[x, y].append(proxy)
+				proxy.cells.append((x, y))
+
+	def remove(self, entity):
+		""" Remove an entity from the grid, if it is there. """
+		proxy = self.proxies.pop(entity, None)
+		if proxy is not None:
+			for cell in proxy.cells:
+				contents = self.cells[cell]
+				contents.remove(proxy)
+				if not contents:
+					del self.cells[cell]
+
+	def query(self, left, bottom, right, top, stats = None):
+		""" Returns the proxies of entities that overlap the given bounds.
+
+			:Parameters:
+				`stats` : dict
+					If given, the ``'comparisons'`` and ``'queries'`` entries are incremented.
+		"""
+		size = self.cell_size
+		x_lo = int(left // size)
+		x_hi = int(right // size) + 1
+		y_lo = int(bottom // size)
+		y_hi = int(top // size) + 1
+		cells = self.cells
+		result = []
+		comparisons = 0
+		if x_hi - x_lo == 1 and y_hi - y_lo == 1:
+			for p in cells.get((x_lo, y_lo), ()):
+				comparisons += 1
+				if p.left < right and left < p.right and p.bottom < top and bottom < p.top:
+					result.append(p)
+		else:
+			# Things that span multiple cells should only be reported once
+			seen = set()
+			for x in range(x_lo, x_hi):
+				for y in range(y_lo, y_hi):
+					for p in cells.get((x, y), ()):
+						if p not in seen:
+							seen.add(p)
+							comparisons += 1
+							if p.left < right and left < p.right and p.bottom < top and bottom < p.top:
+								result.append(p)
+		if stats is not None:
+			stats['comparisons'] += comparisons
+			stats['queries'] += (x_hi - x_lo) * (y_hi - y_lo)
+		return result
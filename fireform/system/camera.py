@@ -22,9 +22,6 @@ class camera_moved(fireform.message.base):
 		self.y = y
 		self.scale = scale
 
-	def name(self):
-		return 'camera_moved'
-
 class camera(base):
 	"""Shove this in your world for cameras to work.
 
@@ -111,8 +108,11 @@ class camera(base):
 	def m_camera_dispel_matrix(self, world, message):
 		fireform.engine.current.camera_dispel()
 
+_camera_apply_matrix = fireform.message.generic('camera_apply_matrix')
+_camera_dispel_matrix = fireform.message.generic('camera_dispel_matrix')
+
 def camera_apply_matrix():
-	return fireform.message.generic('camera_apply_matrix')
+	return _camera_apply_matrix
 
 def camera_dispel_matrix():
-	return fireform.message.generic('camera_dispel_matrix')
+	return _camera_dispel_matrix
@@ -199,6 +199,10 @@ class debug(base):
 	def m_new_entity(self, world, message):
 		self.stats['entities']['alive'] += 1
 
+	@fireform.message.surpass_frozen
+	def m_new_entities(self, world, message):
+		self.stats['entities']['alive'] += len(message.entities)
+
 	@fireform.message.surpass_frozen
 	def m_dead_entity(self, world, message):
 		self.stats['entities']['alive'] -= 1
@@ -250,15 +254,9 @@ class debug(base):
 
 	def find_targeted(self, world):
 		best = None
-		for i in self.filter:
-			x1 = i.box.left
-			x2 = i.box.right
-			y1 = i.box.bottom
-			y2 = i.box.top
-			# Check bounds
-			if min(x1, x2) <= self.mouse_x <= max(x1, x2) and min(y1, y2) <= self.mouse_y <= max(y1, y2):
-				if best == None or i.box.area < best.box.area:
-					best = i
+		for i in world.query_point(self.mouse_x, self.mouse_y, '-#no-debug'):
+			if best == None or i.box.area < best.box.area:
+				best = i
 		return best
 
 	@fireform.message.surpass_frozen
@@ -268,6 +266,8 @@ class debug(base):
 			self.mouse_x = message.x
 			self.mouse_y = message.y
 			if self.selected:
+				# The edited box needs to be found in its new place
+				world.spatial_index().moved([self.targeted])
 				if self.scaling:
 					self.targeted.box.size.x += self.mouse_x - self.mouse_x_last
 					self.targeted.box.size.y += self.mouse_y - self.mouse_y_last
@@ -15,9 +15,17 @@ def get_layer(entity):
 
 
 class image(base):
-	"""This system draws images for you."""
+	"""This system draws images for you.
 
-	def __init__(self):
+	:Parameters:
+		`interpolate` : bool
+			If enabled, sprites are drawn between where they were on the last two ticks,
+			according to :class:`fireform.message.interpolate`. This makes movement smooth
+			when frames are drawn more often than ticks happen, at the cost of
+			showing things a tick late. Defaults to ``False``.
+	"""
+
+	def __init__(self, interpolate = False):
 		# Batches divided into each layer and ordering.
 		self.batches = collections.defaultdict(dict)
 		# Counts number of entities in each layer and ordering.
@@ -29,6 +37,9 @@ class image(base):
 		self.sorted_batches = None
 		# Need the camera system to get the clipping rectangle.
 		self.camera_system = None
+		self.interpolate = interpolate
+		# entity -> (sprite, last x, last y, x, y), for the sprites being interpolated
+		self.positions = {}
 
 	def name(self):
 		return 'fireform.system.image'
@@ -58,8 +69,17 @@ class image(base):
 			layer = get_layer(message.entity)
 			self.batch_numbers[layer][ordering] = self.batch_numbers[layer].get(ordering, 0) + 1
 
+	@fireform.message.surpass_frozen
+	def m_new_entities(self, world, message):
+		for entity in message.entities:
+			if entity['image']:
+				ordering = entity.ordering
+				layer = get_layer(entity)
+				self.batch_numbers[layer][ordering] = self.batch_numbers[layer].get(ordering, 0) + 1
+
 	@fireform.message.surpass_frozen
 	def m_dead_entity(self, world, message):
+		self.positions.pop(message.entity, None)
 		img = message.entity['image']
 		if img and img.sprite_object:
 			ordering = message.entity.ordering
@@ -67,6 +87,12 @@ class image(base):
 			self.batch_numbers[layer][ordering] -= 1
 			if self.batch_numbers[layer][ordering] == 0:
 				del self.batch_numbers[layer][ordering]
+			pool = message.entity._ff_pool
+			if pool is not None and pool.keeps(message.entity):
+				# The entity will be used again, so keep the sprite around
+				img.sprite_object.visible = False
+				img.sprite_object.flush()
+				return
 			img.sprite_object.opacity = 0
 			img.sprite_object.flush()
 			img.sprite_object.delete()
@@ -76,6 +102,15 @@ class image(base):
 	def m_animate(self, world, message):
 		self.update_sprites(not world.frozen)
 
+	@fireform.message.surpass_frozen
+	def m_interpolate(self, world, message):
+		if self.interpolate:
+			alpha = message.alpha
+			for sprite, last_x, last_y, x, y in self.positions.values():
+				sprite.x = int(last_x + (x - last_x) * alpha)
+				sprite.y = int(last_y + (y - last_y) * alpha)
+				sprite.flush()
+
 	@fireform.message.surpass_frozen
 	def m_draw(self, world, message):
 		num_batches = self.sort_and_draw(message.layer)
@@ -121,6 +156,12 @@ class image(base):
 							e_img.sprite_object.crop_box = None
 						sprite.x = int(e_pos.x)
 						sprite.y = int(e_pos.y)
+						if self.interpolate:
+							last = self.positions.get(i)
+							if last is None or last[0] is not sprite:
+								self.positions[i] = (sprite, e_pos.x, e_pos.y, e_pos.x, e_pos.y)
+							else:
+								self.positions[i] = (sprite, last[3], last[4], e_pos.x, e_pos.y)
 						sprite.rotation = e_img.rotation
 						sprite.scale = e_img.scale
 						sprite.visible = True
@@ -129,6 +170,8 @@ class image(base):
 						# pyglet doing an unholy number of extra calculations
 						sprite.flush()
 			else:
+				if self.interpolate:
+					self.positions.pop(i, None)
 				if e_img.sprite_object != None:
 					if e_img.sprite_object.visible:
 						e_img.sprite_object.visible = False
@@ -2,12 +2,14 @@ import collections
 import itertools
 
 from fireform.system.base import base
-from fireform import message
+from fireform.system.broadphase import PARTITION_SIZE
 import fireform.data
+import fireform.efilter
+import fireform.data.store
 import fireform.geom
-
-
-PARTITION_SIZE = 128
+from fireform.system import broadphase
+from fireform.system import narrowphase
+import fireform.message
 
 
 def clamp(val, minimum, maximum):
@@ -27,18 +29,18 @@ def circle_unpack(e):
 
 
 def line_unpack(e):
+	x1, y1, x2, y2 = line_points(e)
+	return fireform.geom.line((x1, y1), (x2, y2))
+
+
+def line_points(e):
+	""" Returns the ends of a line mask as ``x1, y1, x2, y2``. """
 	m = get_mask(e)
-	r = e.box.rectangle
+	box = e.box
 	if m == 'line_up':
-		return fireform.geom.line(
-			(m.left, m.bottom),
-			(m.right, m.top)
-		)
+		return box.left, box.bottom, box.right, box.top
 	if m == 'line_down':
-		return fireform.geom.line(
-			(m.left, m.top),
-			(m.right, m.bottom)
-		)
+		return box.left, box.top, box.right, box.bottom
 	assert(False)
 
 
@@ -68,19 +70,21 @@ def check_overlap_circle_circle(a, b):
 
 
 def check_overlap_rectangle_line(r, l):
-	return False
+	x1, y1, x2, y2 = line_points(l)
+	box = r.box
+	return fireform.geom.segment_rectangle_overlap(x1, y1, x2, y2, box.left, box.bottom, box.right, box.top)
 
 
 def check_overlap_circle_line(c, l):
 	cx, cy, r = circle_unpack(c)
-	l = line_unpack(l)
-	n = l.project_clamped(fireform.geom.vector(cx, cy))
-	o = fireform.geom.vector(cx, cy)
-	return fireform.geom.distance(n, o) < r
+	x1, y1, x2, y2 = line_points(l)
+	return fireform.geom.segment_distance_squared(x1, y1, x2, y2, cx, cy) < r * r
 
 
 def check_overlap_line_line(a, b):
-	return True
+	ax, ay, bx, by = line_points(a)
+	cx, cy, dx, dy = line_points(b)
+	return fireform.geom.segment_segment_overlap(ax, ay, bx, by, cx, cy, dx, dy)
 
 
 def _swap_args(func):
@@ -98,7 +102,8 @@ MASK_JUMPTABLE = {
 	'line_up-line_up': check_overlap_line_line,
 	'circle-line_down': check_overlap_circle_line,
 	'rectangle-line_down': check_overlap_rectangle_line,
-	'line_down-line_down': check_overlap_line_line
+	'line_down-line_down': check_overlap_line_line,
+	'line_up-line_down': check_overlap_line_line
 }
 
 
@@ -118,6 +123,54 @@ def check_overlap_masks(a, b):
 	return MASK_JUMPTABLE[j](a, b)
 
 
+# Groups of pairs smaller than this are tested one at a time,
+# since numpy has a fixed cost for every call.
+NARROWPHASE_BATCH_SIZE = 16
+
+
+def filter_overlapping_masks(pairs, store = None):
+	"""Returns a list of the pairs of entities whose collision masks overlap.
+
+	The boxes of the pairs should already be overlapping. Pairs are grouped by their
+	shapes, and large groups are tested all at once with numpy when it is available.
+	"""
+	result = []
+	groups = collections.defaultdict(list)
+	for pair in pairs:
+		a, b = pair
+		ca = a['collision_mask']
+		cb = b['collision_mask']
+		if ca is None and cb is None:
+			# Both rectangles, and the boxes are known to overlap
+			result.append(pair)
+		else:
+			groups[ca._shape if ca else 'rectangle', cb._shape if cb else 'rectangle'].append(pair)
+	for key, group in groups.items():
+		kernel = narrowphase.JUMPTABLE.get(key)
+		if kernel is not None and narrowphase.numpy is not None and len(group) >= NARROWPHASE_BATCH_SIZE:
+			mask = kernel(
+				narrowphase.bounds([a for a, b in group], store),
+				narrowphase.bounds([b for a, b in group], store)
+			)
+			result.extend(pair for pair, overlap in zip(group, mask.tolist()) if overlap)
+		else:
+			func = MASK_JUMPTABLE[key[0] + '-' + key[1]]
+			result.extend(pair for pair in group if func(*pair))
+	return result
+
+
+def ray_mask_time(entity, x, y, dx, dy, box_time):
+	""" Returns when a ray that entered an entity's box at ``box_time`` enters its collision mask, or ``None``. """
+	m = get_mask(entity)
+	if m == 'rectangle':
+		return box_time
+	if m == 'circle':
+		cx, cy, r = circle_unpack(entity)
+		return fireform.geom.segment_circle_time(x, y, dx, dy, cx, cy, r)
+	ax, ay, bx, by = line_points(entity)
+	return fireform.geom.segment_segment_time(x, y, dx, dy, ax, ay, bx, by)
+
+
 def update_position_x(entities):
 	for i in entities:
 		i.box.x += i['velocity'].x
@@ -128,6 +181,20 @@ def update_position_y(entities):
 		i.box.y += i['velocity'].y
 
 
+def pair_deliveries(pairs, *arguments):
+	""" Yields a delivery of a pair message, such as ``collision``, to each entity in each pair. """
+	for a, b in pairs:
+		yield a, (a, b) + arguments
+		yield b, (b, a) + arguments
+
+
+def other_deliveries(pairs):
+	""" Yields a delivery of a message that holds only the other entity, to each entity in each pair. """
+	for a, b in pairs:
+		yield a, (b,)
+		yield b, (a,)
+
+
 def get_bucket(entity):
 	b = entity['collision_bucket']
 	return b.bucket if b else 'default'
@@ -143,12 +210,58 @@ def get_mask(entity):
 	return c._shape if c else 'rectangle'
 
 
-def group_by_bucket(entities):
-	result = collections.defaultdict(list)
-	for i in entities:
-		bucket = get_bucket(i)
-		result[bucket].append(i)
-	return result.values()
+def group_bucket_pairs(pairs):
+	""" Splits the buckets in the pairs into groups that can collide with each other.
+
+		Returns a dictionary that maps each bucket to the first bucket of its group.
+	"""
+	groups = {}
+	for a, b in pairs:
+		ga = groups.get(a)
+		gb = groups.get(b)
+		if ga is None and gb is None:
+			groups[a] = groups[b] = a
+		elif ga is None:
+			groups[a] = gb
+		elif gb is None:
+			groups[b] = ga
+		elif ga != gb:
+			for bucket, group in groups.items():
+				if group == gb:
+					groups[bucket] = ga
+	return groups
+
+
+BROADPHASES = {
+	'sweep': broadphase.sweep,
+	'grid': broadphase.spatial_hash
+}
+
+
+class static_grid:
+	""" Holds the entities that never move, with a grid for each collision bucket.
+
+		This can be piped from a :class:`fireform.efilter.Filter`.
+	"""
+
+	def __init__(self, cell_size = PARTITION_SIZE):
+		self.cell_size = cell_size
+		self.grids = {}
+		self.hash = id(self)
+
+	def __len__(self):
+		return sum(map(len, self.grids.values()))
+
+	def insert(self, entity):
+		bucket = get_bucket(entity)
+		grid = self.grids.get(bucket)
+		if grid is None:
+			grid = self.grids[bucket] = broadphase.grid(self.cell_size)
+		grid.insert(entity, is_extrovert(entity))
+
+	def remove(self, entity):
+		for grid in self.grids.values():
+			grid.remove(entity)
 
 
 class motion(base):
@@ -163,127 +276,426 @@ class motion(base):
 				- If ``'split'``, motion will occur on each axis sperately. \
 					Collision events will have the ``direction`` attribute set \
 					either ``'horisontal'`` or ``'vertical'``.
+				- If ``'swept'``, collisions are found along the whole path that each \
+					entity moves this tick, so fast entities cannot pass through thin ones. \
+					Collision events will have the ``time`` and ``normal`` attributes set. \
+					Collision masks are ignored, and every entity is treated as a rectangle.
 			`ignore_masks` : bool
 				If enabled, all entities will be treated as if they had rectangular
 				collision masks. Defaults to ``False``.
+			`broadphase` : string
+				- If ``'sweep'``, collisions are found by sweeping along the x axis, \
+					with the y axis split into partitions of ``cell_size``.
+				- If ``'grid'``, collisions are found using a uniform grid of cells \
+					that are ``cell_size`` wide and high. This is faster for large \
+					numbers of small entities.
+				Defaults to ``'sweep'``.
+			`cell_size` : float
+				The size of the partitions or cells used by the broadphase. Defaults to 128.
+			`bucket_settings` : dict
+				Overrides the ``broadphase`` and ``cell_size`` of particular collision buckets.
+				For example, ``{'bullets': {'broadphase': 'grid', 'cell_size': 16}}``.
+				Buckets that can collide with each other share a broadphase, which
+				uses the settings of the bucket that appears first in ``bucket_pairs``.
+			`bucket_pairs` : list
+				The pairs of collision buckets that can collide with each other.
+				For example, ``[('player', 'enemy_bullets'), ('enemies', 'player_bullets')]``.
+				A bucket only collides with itself if it is paired with itself,
+				and buckets that are not in any pair do not collide at all.
+				By default, each bucket collides only with itself.
+			`array_store` : bool
+				If enabled, the box, velocity, acceleration and friction components are
+				kept in numpy arrays by a :class:`fireform.data.store.array_store`, and
+				motion is applied to every entity at once. Requires numpy.
+				Defaults to ``False``.
+			`static_index` : bool
+				If enabled, entities without velocity and entities tagged ``static``
+				are placed into a grid when they are added, and are only checked
+				against entities that move. Static entities must not move once
+				they have been added, and will not collide with each other.
+				Defaults to ``False``.
+			`static_cell_size` : float
+				The size of the cells in the static grid. Defaults to 128.
+			`contact_events` : bool
+				If enabled, the pairs of entities that are touching are remembered
+				between ticks, and :class:`fireform.message.collision_enter`,
+				:class:`fireform.message.collision_stay` and :class:`fireform.message.collision_exit`
+				are sent to them at the end of each tick. Defaults to ``False``.
+			`repeat_collisions` : bool
+				If disabled, ``collision`` and ``collision_late`` are only sent on the
+				first tick that two entities touch, rather than on every tick that
+				they are touching. Defaults to ``True``.
 
 	"""
 
-	def __init__(self, collision_mode = 'normal', ignore_masks = False):
+	def __init__(self, collision_mode = 'normal', ignore_masks = False, static_index = False, static_cell_size = PARTITION_SIZE,
+			broadphase = 'sweep', cell_size = PARTITION_SIZE, bucket_settings = None, bucket_pairs = None, array_store = False,
+			contact_events = False, repeat_collisions = True):
 		self.ignore_masks = ignore_masks
 		self.collision_mode = collision_mode
-		if self.collision_mode not in ('disabled', 'normal', 'split'):
-			raise ValueError('collision_mode must be "disabled", "normal" or "split".')
+		if self.collision_mode not in ('disabled', 'normal', 'split', 'swept'):
+			raise ValueError('collision_mode must be "disabled", "normal", "split" or "swept".')
+		self.broadphase = broadphase
+		self.cell_size = cell_size
+		self.bucket_settings = bucket_settings or {}
+		for i in [broadphase] + [i.get('broadphase', broadphase) for i in self.bucket_settings.values()]:
+			if i not in BROADPHASES:
+				raise ValueError('broadphase must be "sweep" or "grid".')
+		self.bucket_pairs = None
+		self.bucket_partners = None
+		self.bucket_groups = None
+		# Groups that hold pairs of buckets which cannot collide
+		self.mixed_groups = set()
+		if bucket_pairs is not None:
+			self.bucket_pairs = set()
+			self.bucket_partners = collections.defaultdict(set)
+			for a, b in bucket_pairs:
+				self.bucket_pairs.add((a, b))
+				self.bucket_pairs.add((b, a))
+				self.bucket_partners[a].add(b)
+				self.bucket_partners[b].add(a)
+			self.bucket_groups = group_bucket_pairs(bucket_pairs)
+			for bucket, group in self.bucket_groups.items():
+				if bucket != group or (bucket, bucket) not in self.bucket_pairs:
+					self.mixed_groups.add(group)
 		self.filter_acceleration = None
 		self.filter_velocity = None
 		self.filter_collisions = None
 		self.filter_friction = None
+		self.filter_moving = None
+		self.sorter_buckets = None
+		self.archetypes = None
 		self.collisions_late = set()
+		self.contact_events = contact_events
+		self.repeat_collisions = repeat_collisions
+		# Pairs that were touching last tick, and those found so far this tick.
+		# These are only kept if they are needed.
+		self.contacts = set()
+		self.touching = set() if contact_events or not repeat_collisions else None
+		self.static_grid = static_grid(static_cell_size) if static_index else None
+		self.store = fireform.data.store.array_store() if array_store else None
+		# Broadphase for each group of collision buckets, kept between ticks.
+		self.broadphases = {}
+		self.world = None
 
 	def name(self):
 		return 'fireform.system.motion'
 
 	def attach(self, world):
+		self.world = world
 		self.filter_acceleration = world.filter_root.chain('velocity > acceleration')
 		self.filter_friction = world.filter_root.chain('velocity > friction')
 		self.filter_velocity = world.filter_root.chain('box > velocity')
 		self.filter_collisions = world.filter_root.chain('box > -#no-collision')
+		self.archetypes = world.archetypes
+		if self.static_grid is None:
+			self.filter_moving = self.filter_collisions
+		else:
+			self.filter_moving = self.filter_collisions.chain('velocity > -#static')
+			self.filter_collisions.chain('-velocity').pipe(self.static_grid)
+			self.filter_collisions.chain('#static').pipe(self.static_grid)
+		self.sorter_buckets = self.filter_moving.pipe(fireform.efilter.Sorter(get_bucket))
+		if self.store is not None:
+			world.filter_root.chain('box').pipe(self.store)
+			world.filter_root.chain('velocity').pipe(self.store)
+
+	@fireform.message.surpass_frozen
+	def m_dead_entity(self, world, message):
+		if self.sorter_buckets is not None:
+			self.sorter_buckets.remove(message.entity)
+		if self.static_grid is not None:
+			self.static_grid.remove(message.entity)
+		if self.store is not None:
+			self.store.remove(message.entity)
+
+	def update_position(self, axis):
+		"""Adds velocity to position along one axis (0 for x, 1 for y)."""
+		if self.store is not None:
+			self.store.move(axis)
+		elif self.archetypes is not None:
+			for entities, boxes, velocities in self.archetypes.blocks('box > velocity', 'box', 'velocity'):
+				if axis == 0:
+					for b, v in zip(boxes, velocities):
+						b.x += v.x
+				else:
+					for b, v in zip(boxes, velocities):
+						b.y += v.y
+		elif axis == 0:
+			update_position_x(self.filter_velocity)
+		else:
+			update_position_y(self.filter_velocity)
 
 	def m_tick(self, world, m):
 
-		# Acceleration
-		for i in self.filter_acceleration:
-			vel = i[fireform.data.velocity]
-			acl = i[fireform.data.acceleration]
-			vel.x += acl.x
-			vel.y += acl.y
-			# vel.x *= acl.friction
-			# vel.y *= acl.friction
-
-		for i in self.filter_friction:
-			i.velocity.x *= i.friction.x
-			i.velocity.y *= i.friction.y
+		if self.store is not None:
+			self.store.accelerate()
+
+		elif self.archetypes is not None:
+			for entities, vels, acls in self.archetypes.blocks('velocity > acceleration', 'velocity', 'acceleration'):
+				for vel, acl in zip(vels, acls):
+					vel.x += acl.x
+					vel.y += acl.y
+			for entities, vels, frics in self.archetypes.blocks('velocity > friction', 'velocity', 'friction'):
+				for vel, fric in zip(vels, frics):
+					vel.x *= fric.x
+					vel.y *= fric.y
+
+		else:
+			# Acceleration
+			for i in self.filter_acceleration:
+				vel = i[fireform.data.velocity]
+				acl = i[fireform.data.acceleration]
+				vel.x += acl.x
+				vel.y += acl.y
+				# vel.x *= acl.friction
+				# vel.y *= acl.friction
+
+			for i in self.filter_friction:
+				i.velocity.x *= i.friction.x
+				i.velocity.y *= i.friction.y
 
 		self.collisions_late = set()
 
 		if self.collision_mode == 'disabled':
-			update_position_x(self.filter_velocity)
-			update_position_y(self.filter_velocity)
+			self.update_position(0)
+			self.update_position(1)
 
 		elif self.collision_mode == 'normal':
-			update_position_x(self.filter_velocity)
-			update_position_y(self.filter_velocity)
+			self.update_position(0)
+			self.update_position(1)
 			self.check_collisions(world, None)
 
 		elif self.collision_mode == 'split':
-			update_position_x(self.filter_velocity)
+			self.update_position(0)
 			self.check_collisions(world, 'horisontal')
-			update_position_y(self.filter_velocity)
+			self.update_position(1)
 			self.check_collisions(world, 'vertical')
 
-		for a, b in self.collisions_late:
-			world.post_message_private(message.collision_late(a, b), [a])
-			world.post_message_private(message.collision_late(b, a), [b])
+		elif self.collision_mode == 'swept':
+			self.check_collisions_swept(world)
 
-	def check_collisions(self, world, direction_name):
-		comparison_count = 0
+		world.post_messages_private(fireform.message.collision_late, pair_deliveries(self.collisions_late))
+
+		if self.touching is not None:
+			self.update_contacts(world)
+
+		if world.spatial is not None:
+			# Raycasts and other queries should see where things have moved to
+			world.spatial.moved(self.filter_velocity)
+
+	def find_candidates(self, swept = False):
+		"""Returns the set of pairs of entities whose boxes overlap, and the broadphase statistics.
+
+		If ``swept`` is true, the boxes are stretched to cover the movement of the entities
+		over the coming tick.
+		"""
 		collisions = set()
-		region_count = 0
-		# active = set()
-		for bucket in group_by_bucket(self.filter_collisions):
-			events = []
-			active = collections.defaultdict(set)
-			extrov = collections.defaultdict(set)
-			for i in bucket:
-				if i.box.right > i.box.left and i.box.top > i.box.bottom:
-					events.append((i.box.left, i, 'push'))
-					events.append((i.box.right, i, 'pop'))
-			# Pushes should always be after pops when things have the same x-ordinate
-			events.sort(key = lambda x: x[2] == 'push')
-			events.sort(key = lambda x: x[0])
-			# print(events)
-			for place, entity, action in events:
-				partition_bottom = int(entity.box.bottom // PARTITION_SIZE)
-				partition_top = int(entity.box.top // PARTITION_SIZE) + 1
-				ex = is_extrovert(entity)
-				if action == 'pop':
-					# Only count these things once
-					region_count += partition_top - partition_bottom
-					# active.discard(entity)
-					if ex:
-						for i in range(partition_bottom, partition_top):
-							extrov[i].discard(entity)
-					else:
-						for i in range(partition_bottom, partition_top):
-							active[i].discard(entity)
-				else:
-					for i in range(partition_bottom, partition_top):
-						for other in active[i]:
-							comparison_count += 1
-							if check_overlap_y(entity, other):
-								collisions.add((entity, other))
-					if not ex:
-						for i in range(partition_bottom, partition_top):
-							for other in extrov[i]:
-								comparison_count += 1
-								if check_overlap_y(entity, other):
-									collisions.add((entity, other))
-
-					if ex:
-						for i in range(partition_bottom, partition_top):
-							extrov[i].add(entity)
-					else:
-						for i in range(partition_bottom, partition_top):
-							active[i].add(entity)
+		stats = collections.Counter()
+		buckets = {}
+		for bucket in list(self.sorter_buckets.contents):
+			entities = self.sorter_buckets[bucket]
+			if entities:
+				buckets[bucket] = entities
+			else:
+				del self.sorter_buckets.contents[bucket]
+		groups = collections.defaultdict(list)
+		for bucket, entities in buckets.items():
+			group = self.bucket_group(bucket)
+			if group is not None:
+				groups[group].extend(entities)
+		# Forget about groups that have emptied out
+		for group in list(self.broadphases):
+			if group not in groups:
+				del self.broadphases[group]
+		for group, entities in groups.items():
+			# A single entity has nothing to hit, and its broadphase is thrown
+			# away so that it does not hold on to entities killed since it was used
+			if len(entities) < 2:
+				self.broadphases.pop(group, None)
+				continue
+			broadphase = self.broadphases.get(group)
+			if broadphase is None:
+				broadphase = self.broadphases[group] = self.create_broadphase(group)
+			broadphase.update(entities, is_extrovert, swept)
+			if group in self.mixed_groups:
+				found = set()
+				broadphase.find_pairs(found, stats)
+				pairs = self.bucket_pairs
+				collisions.update(p for p in found if (get_bucket(p[0]), get_bucket(p[1])) in pairs)
+			else:
+				broadphase.find_pairs(collisions, stats)
+		if self.static_grid is not None:
+			for bucket, entities in buckets.items():
+				for partner in self.partners(bucket):
+					grid = self.static_grid.grids.get(partner)
+					if grid:
+						self.check_static(grid, entities, collisions, stats, swept)
+		return collisions, stats
+
+	def bucket_group(self, bucket):
+		"""Returns the group of buckets that a bucket shares a broadphase with, or ``None``."""
+		if self.bucket_groups is None:
+			return bucket
+		return self.bucket_groups.get(bucket)
+
+	def partners(self, bucket):
+		"""Returns the buckets that a bucket can collide with."""
+		if self.bucket_partners is None:
+			return (bucket,)
+		return self.bucket_partners.get(bucket, ())
+
+	def ray_test(self, x1, y1, x2, y2, buckets, ignore):
+		"""Returns the function used by the spatial index to check what a ray hits."""
+		dx = x2 - x1
+		dy = y2 - y1
+		masks = not self.ignore_masks
+		def test(entity, time):
+			if entity in ignore:
+				return None
+			if buckets is not None and get_bucket(entity) not in buckets:
+				return None
+			if masks:
+				return ray_mask_time(entity, x1, y1, dx, dy, time)
+			return time
+		return test
+
+	def raycast(self, x1, y1, x2, y2, buckets = None, limit = None, ignore = ()):
+		"""Finds the entities whose collision masks are crossed by a line segment.
+
+		Entities tagged ``no-collision`` are not hit. Returns a list of ``(entity, time)``
+		tuples, nearest first, where ``time`` is the fraction of the way along the
+		segment at which the entity was hit.
 
-		for a, b in collisions:
-			if self.ignore_masks or check_overlap_masks(a, b):
-				world.post_message_private(message.collision(a, b, direction_name), [a])
-				world.post_message_private(message.collision(b, a, direction_name), [b])
-				self.collisions_late.add((a, b))
+		:Parameters:
+			`buckets` : set
+				If given, only entities in these collision buckets are hit.
+			`limit` : int
+				The most entities to return. Use ``1`` to find only the nearest.
+			`ignore` : set
+				Entities that the ray passes through, such as the one firing it.
 
+		"""
+		index = self.world.spatial_index()
+		test = self.ray_test(x1, y1, x2, y2, buckets, ignore)
+		return index.raycast(x1, y1, x2, y2, '-#no-collision', limit, test)
+
+	def raycast_many(self, rays, buckets = None, limit = 1, ignore = ()):
+		"""Casts many rays at once, such as for the vision cones of a crowd of enemies.
+
+		:Parameters:
+			`rays` : iterable
+				Tuples of ``(x1, y1, x2, y2)``.
+
+		The other parameters are the same as for :meth:`raycast`, but ``limit`` defaults
+		to ``1``. Returns a list holding the result of each ray.
+		"""
+		index = self.world.spatial_index()
+		index.sync()
+		cast = index.raycast
+		make_test = self.ray_test
+		return [cast(x1, y1, x2, y2, '-#no-collision', limit, make_test(x1, y1, x2, y2, buckets, ignore))
+			for x1, y1, x2, y2 in rays]
+
+	def line_of_sight(self, x1, y1, x2, y2, buckets = None, ignore = ()):
+		"""Returns ``True`` if nothing is in the way between two points."""
+		return not self.raycast(x1, y1, x2, y2, buckets, 1, ignore)
+
+	def check_collisions(self, world, direction_name):
+		collisions, stats = self.find_candidates()
+
+		hits = len(collisions)
+		if not self.ignore_masks:
+			collisions = filter_overlapping_masks(collisions, self.store)
+		collisions = self.record_contacts(collisions)
+		world.post_messages_private(fireform.message.collision, pair_deliveries(collisions, direction_name))
+		self.collisions_late.update(collisions)
+
+		self.report_stats(world, hits, stats)
+
+	def check_collisions_swept(self, world):
+		"""Moves the entities, and reports the collisions that happen along the way."""
+		candidates, stats = self.find_candidates(swept = True)
+		impacts = []
+		for a, b in candidates:
+			va = a['velocity']
+			vb = b['velocity']
+			vx = (va.x if va else 0) - (vb.x if vb else 0)
+			vy = (va.y if va else 0) - (vb.y if vb else 0)
+			ba = a.box
+			bb = b.box
+			impact = fireform.geom.swept_box_time(
+				ba.left, ba.bottom, ba.right, ba.top, vx, vy,
+				bb.left, bb.bottom, bb.right, bb.top
+			)
+			if impact is not None:
+				impacts.append((impact, a, b))
+		if self.touching is not None:
+			reported = set(self.record_contacts([(a, b) for impact, a, b in impacts]))
+			impacts = [i for i in impacts if (i[1], i[2]) in reported]
+		self.update_position(0)
+		self.update_position(1)
+		# Earliest impacts are reported first
+		impacts.sort(key = lambda i: i[0][0])
+		deliveries = []
+		for (time, nx, ny), a, b in impacts:
+			deliveries.append((a, (a, b, None, time, fireform.geom.vector(nx, ny))))
+			deliveries.append((b, (b, a, None, time, fireform.geom.vector(-nx, -ny))))
+			self.collisions_late.add((a, b))
+		world.post_messages_private(fireform.message.collision, deliveries)
+		self.report_stats(world, len(candidates), stats)
+
+	def record_contacts(self, collisions):
+		"""Remembers that the pairs are touching, and returns the ones that collision messages should be sent for."""
+		touching = self.touching
+		if touching is None:
+			return collisions
+		contacts = self.contacts
+		result = []
+		for a, b in collisions:
+			pair = (a, b) if id(a) < id(b) else (b, a)
+			touching.add(pair)
+			if self.repeat_collisions or pair not in contacts:
+				result.append((a, b))
+		return result
+
+	def update_contacts(self, world):
+		"""Compares the pairs touching this tick with the last, and sends the contact messages."""
+		touching = self.touching
+		contacts = self.contacts
+		if self.contact_events:
+			world.post_messages_private(fireform.message.collision_enter, other_deliveries(touching - contacts))
+			world.post_messages_private(fireform.message.collision_stay, other_deliveries(touching & contacts))
+			# Dead entities do not need to be told
+			exits = other_deliveries(contacts - touching)
+			world.post_messages_private(fireform.message.collision_exit, (i for i in exits if i[0].alive))
+		self.contacts = touching
+		self.touching = set()
+
+	def report_stats(self, world, hits, stats):
 		debug_sys = world.systems_by_name.get('fireform.system.debug')
 		if debug_sys:
-			debug_sys.set_stat('collisions.hits', len(collisions))
-			debug_sys.set_stat('collisions.misses', comparison_count - len(collisions))
-			debug_sys.set_stat('collisions.queries', region_count)
+			debug_sys.set_stat('collisions.hits', hits)
+			debug_sys.set_stat('collisions.misses', stats['comparisons'] - hits)
+			debug_sys.set_stat('collisions.queries', stats['queries'])
+
+	def create_broadphase(self, bucket):
+		"""Creates the broadphase used for a group of collision buckets."""
+		settings = self.bucket_settings.get(bucket, {})
+		kind = settings.get('broadphase', self.broadphase)
+		return BROADPHASES[kind](settings.get('cell_size', self.cell_size))
+
+	def check_static(self, grid, entities, collisions, stats, swept = False):
+		"""Finds the static entities that overlap the moving ones."""
+		for entity in entities:
+			box = entity.box
+			left = box.left
+			right = box.right
+			bottom = box.bottom
+			top = box.top
+			if right > left and top > bottom:
+				if swept:
+					left, bottom, right, top = broadphase.swept_bounds(entity, left, bottom, right, top)
+				extrovert = is_extrovert(entity)
+				for other in grid.query(left, bottom, right, top, stats):
+					if other.entity.alive and not (extrovert and other.extrovert):
+						collisions.add((entity, other.entity))
@@ -0,0 +1,131 @@
+"""
+
+	Overlap tests for collision masks that work on many pairs at once.
+
+	Each test takes two arrays of bounds, one row per pair, with the columns
+	``left, bottom, right, top``. It returns an array of booleans that says
+	which pairs overlap. These require numpy.
+
+"""
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+def bounds(entities, store = None):
+	""" Returns the bounds of the entities' boxes as an array.
+
+		:Parameters:
+			`entities` : list
+				The entities.
+			`store` : :class:`fireform.data.store.array_store`
+				If given, and all the entities are in it, the bounds are
+				calculated directly from the store's arrays.
+	"""
+	if store is not None:
+		rows = [store.rows.get(e) for e in entities]
+		if None not in rows:
+			pos = store.position[rows]
+			size = store.size[rows]
+			anchor = store.anchor[rows]
+			low = pos - size * anchor
+			return numpy.concatenate((low, low + size), axis = 1)
+	result = numpy.empty((len(entities), 4))
+	result[:] = [(e.box.left, e.box.bottom, e.box.right, e.box.top) for e in entities]
+	return result
+
+
+def circles(b):
+	""" Returns the centres and radii of the circles that fit inside the bounds. """
+	cx = (b[:, 0] + b[:, 2]) / 2
+	cy = (b[:, 1] + b[:, 3]) / 2
+	r = numpy.minimum(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]) / 2
+	return cx, cy, r
+
+
+def rectangle_circle(a, b):
+	cx, cy, r = circles(b)
+	x = numpy.minimum(numpy.maximum(cx, a[:, 0]), a[:, 2])
+	y = numpy.minimum(numpy.maximum(cy, a[:, 1]), a[:, 3])
+	dx = cx - x
+	dy = cy - y
+	return dx * dx + dy * dy < r * r
+
+
+def circle_circle(a, b):
+	ax, ay, ar = circles(a)
+	bx, by, br = circles(b)
+	dx = ax - bx
+	dy = ay - by
+	tr = ar + br
+	return dx * dx + dy * dy < tr * tr
+
+
+def line_ends(b, up):
+	""" Returns the start of the diagonals of the bounds, and the offset to their ends. """
+	px = b[:, 0]
+	dx = b[:, 2] - px
+	if up:
+		py = b[:, 1]
+		dy = b[:, 3] - py
+	else:
+		py = b[:, 3]
+		dy = b[:, 1] - py
+	return px, py, dx, dy
+
+
+def circle_line(a, b, up):
+	""" Tests circles against the diagonals of the bounds.
+
+		If ``up`` is true the line goes from the bottom left to the top right,
+		otherwise it goes from the top left to the bottom right.
+	"""
+	cx, cy, r = circles(a)
+	px, py, dx, dy = line_ends(b, up)
+	length = dx * dx + dy * dy
+	# Position of the closest point along the line, clamped to the ends
+	t = numpy.divide((cx - px) * dx + (cy - py) * dy, length, out = numpy.zeros_like(length), where = length > 0)
+	t = numpy.clip(t, 0, 1)
+	ox = px + dx * t - cx
+	oy = py + dy * t - cy
+	return ox * ox + oy * oy < r * r
+
+
+def rectangle_line(a, b, up):
+	""" Tests rectangles against the diagonals of the bounds.
+
+		This matches :func:`fireform.geom.segment_rectangle_overlap`.
+	"""
+	px, py, dx, dy = line_ends(b, up)
+	left, bottom, right, top = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+	c1 = dx * (bottom - py) - dy * (left - px)
+	c2 = dx * (bottom - py) - dy * (right - px)
+	c3 = dx * (top - py) - dy * (left - px)
+	c4 = dx * (top - py) - dy * (right - px)
+	low = numpy.minimum(numpy.minimum(c1, c2), numpy.minimum(c3, c4))
+	high = numpy.maximum(numpy.maximum(c1, c2), numpy.maximum(c3, c4))
+	# The bounds of the line are the bounds in b, which the broadphase has already checked
+	return (low < 0) & (high > 0)
+
+
+def _swap_args(func):
+	def internal(a, b):
+		return func(b, a)
+	return internal
+
+
+JUMPTABLE = {
+	('rectangle', 'circle'): rectangle_circle,
+	('circle', 'circle'): circle_circle,
+	('circle', 'line_up'): lambda a, b: circle_line(a, b, True),
+	('circle', 'line_down'): lambda a, b: circle_line(a, b, False),
+	('rectangle', 'line_up'): lambda a, b: rectangle_line(a, b, True),
+	('rectangle', 'line_down'): lambda a, b: rectangle_line(a, b, False)
+}
+
+
+for (first, second), func in list(JUMPTABLE.items()):
+	if first != second:
+		JUMPTABLE[second, first] = _swap_args(func)
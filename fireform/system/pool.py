@@ -0,0 +1,88 @@
+from fireform.system.base import base
+import fireform.message
+
+
+class pool(base):
+	""" Recycles dead entities, so that entities which are created and destroyed
+		constantly, such as bullets and particles, do not need to be built again.
+
+		When an entity made by the pool dies, it is kept rather than thrown away,
+		along with its components and the sprite that was drawing it. The next
+		call to :meth:`spawn` brings it back to life instead of making a new one.
+
+		:Parameters:
+			`factory` : callable
+				Takes no arguments and returns a new entity.
+			`reset` : callable
+				Called with an entity, followed by the arguments given to :meth:`spawn`,
+				each time an entity is spawned. It should set the entity back to a
+				fresh state, such as by moving it and setting its velocity.
+			`name` : string
+				Distinguishes the pool from other pools in the same world.
+				Defaults to ``'default'``.
+			`capacity` : int
+				The largest number of dead entities that are kept.
+				Defaults to ``None``, meaning no limit.
+
+		Example::
+
+			bullets = fireform.system.pool(make_bullet, reset_bullet, name = 'bullets')
+			world.add_system(bullets)
+			bullets.spawn(x, y, direction)
+
+	"""
+
+	def __init__(self, factory, reset = None, name = 'default', capacity = None):
+		self.factory = factory
+		self.reset = reset
+		self.pool_name = name
+		self.capacity = capacity
+		self.free = []
+		self.created = 0
+		self.world = None
+
+	def name(self):
+		return 'fireform.system.pool.' + self.pool_name
+
+	def attach(self, world):
+		self.world = world
+
+	def take(self, *args, **kwargs):
+		""" Returns a reset entity, either recycled or new, without adding it to the world. """
+		if self.free:
+			entity = self.free.pop()
+		else:
+			entity = self.factory()
+			entity._ff_pool = self
+			self.created += 1
+		if self.reset is not None:
+			self.reset(entity, *args, **kwargs)
+		return entity
+
+	def spawn(self, *args, **kwargs):
+		""" Adds an entity to the world, and returns it.
+
+			The arguments are passed on to ``reset``.
+		"""
+		return self.world.add_entity(self.take(*args, **kwargs))
+
+	def keeps(self, entity):
+		""" Returns whether a dead entity made by this pool is kept to be used again.
+
+			This gives the same answer whether it is asked before or after the
+			pool has seen the entity die, so other systems do not depend on the
+			order that they were added in.
+		"""
+		# Once the pool has kept an entity it has been brought back to life
+		return entity.alive or self.capacity is None or len(self.free) < self.capacity
+
+	@fireform.message.surpass_frozen
+	def m_dead_entity(self, world, message):
+		entity = message.entity
+		if entity._ff_pool is self:
+			if self.keeps(entity):
+				entity.revive()
+				self.free.append(entity)
+			else:
+				# The pool is full, so the entity is thrown away like any other
+				entity._ff_pool = None
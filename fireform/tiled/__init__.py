@@ -158,3 +158,28 @@ def unravel_polyline(polyline):
 			(x + i['x'], y - i['y']),
 			(x + j['x'], y - j['y'])
 		)
+
+
+def segment_collider(start, end):
+	""" Creates the components for a collider that covers a single line segment.
+
+		Returns a box and a line collision mask, which can be passed to :class:`fireform.entity.entity`.
+		Segments that are perfectly horizontal or vertical have empty boxes and will not collide.
+
+		.. code:: python
+
+			# Example usage as a loader rule
+			def make_slope(obj):
+				for start, end in tiled.unravel_polyline(obj):
+					yield fireform.entity(*tiled.segment_collider(start, end), tags = 'solid')
+
+	"""
+	(x1, y1), (x2, y2) = start, end
+	box = fireform.data.box.from_bounds(
+		left = min(x1, x2),
+		right = max(x1, x2),
+		bottom = min(y1, y2),
+		top = max(y1, y2)
+	)
+	rising = (x2 - x1) * (y2 - y1) > 0
+	return box, fireform.data.collision_mask('line_up' if rising else 'line_down')
@@ -0,0 +1,41 @@
+class fixed_step:
+	""" Works out how many ticks to run to keep up with real time.
+
+		The time that has passed is added up, and a tick is run for each
+		whole interval of it. Anything left over is kept for next time, and
+		is given as ``alpha``, which is how far the next tick has got.
+
+		:Parameters:
+			`ticks_per_second` : float
+				How often ticks should happen.
+			`max_steps` : int
+				The most ticks to run for a single call to :meth:`advance`.
+				If the game falls further behind than this, the extra time
+				is dropped and the game slows down, instead of running more
+				and more ticks to catch up. Defaults to 5.
+	"""
+
+	def __init__(self, ticks_per_second = 60, max_steps = 5):
+		self.interval = 1 / ticks_per_second
+		self.max_steps = max_steps
+		self.accumulator = 0
+		# Number of ticks that were skipped because the game fell too far behind
+		self.dropped = 0
+
+	def advance(self, delta_time):
+		""" Adds the time that has passed, in seconds, and returns the number of ticks to run. """
+		self.accumulator += delta_time
+		steps = int(self.accumulator // self.interval)
+		if steps > self.max_steps:
+			self.dropped += steps - self.max_steps
+			steps = self.max_steps
+			# Keep only what has built up towards the next tick
+			self.accumulator %= self.interval
+		else:
+			self.accumulator -= steps * self.interval
+		return steps
+
+	@property
+	def alpha(self):
+		""" How far it is from the last tick to the next one, from 0 to 1. """
+		return min(self.accumulator / self.interval, 1)
@@ -2,42 +2,114 @@ import copy
 import traceback
 import collections
 import inspect
+import itertools
+import sortedcontainers
 import fireform.message
 import fireform.efilter
+import fireform.spatial
 import fireform.util.timer
 import fireform.behaviour
 
+_cleanup_message = fireform.message.generic('_cleanup')
+_tick_type = fireform.message.tick().type_id
+
+
+def ordering_key(entity):
+	"""The key that the world's entity list is sorted by.
+
+	This is the entity's ordering when it was added, followed by a number that increases
+	with each entity added, so entities with the same ordering stay in the order they were added.
+	"""
+	return entity._ff_order
+
+
 class world:
 	""" World used to control game events and ticks.
 		Holds a list of entities.
+
+		:Parameters:
+			`archetypes` : bool
+				If enabled, entities are also stored in a :class:`fireform.efilter.ArchetypeIndex`,
+				as ``world.archetypes``, which systems can use to iterate over the
+				components of many entities at once. Filters made from ``filter_root``
+				are then iterated over archetype by archetype. Defaults to ``False``.
 	"""
 
-	def __init__(self):
-		self.entities = []
+	def __init__(self, archetypes = False):
+		# Sorted by ordering as entities are added
+		self.entities = sortedcontainers.SortedListWithKey(key = ordering_key)
+		self.sequence = itertools.count()
+		# Entities killed since the last refresh
+		self.killed = []
+		# Entities waiting to be added by spawn_batch
+		self.spawning = []
 		self.systems = []
 		self.systems_by_name = {}
-		l = lambda : collections.defaultdict(list)
-		self.message_handlers = l()
-		self.message_handlers_by_entity = collections.defaultdict(l)
+		# Bound behaviour handlers, resolved when entities are added.
+		# Each maps a message type id to a list of (entity, handler) pairs.
+		# The frozen variant only holds the handlers that surpass freezing.
+		self.message_handlers = collections.defaultdict(list)
+		self.message_handlers_frozen = collections.defaultdict(list)
+		# entity -> message type id -> list of (handler, surpass_frozen)
+		self.message_handlers_by_entity = {}
+		# message type id -> (handlers, frozen handlers), built lazily
+		self.system_handlers = {}
 		self.message_types = set()
 		self.filter_root = fireform.efilter.Filter('')
+		self.archetypes = None
+		if archetypes:
+			self.archetypes = self.filter_root.pipe(fireform.efilter.ArchetypeIndex())
+			self.filter_root.use_archetypes(self.archetypes)
+		# Made the first time that a spatial query is used
+		self.spatial = None
 		self.frozen = False
 
 	def refresh_entities(self):
-		"""Remove all dead entities from the entity list, and sort the living ones by ordering.
-
-		Any entities added or destroyed will invalidate the list. You can call this to
-		clean it up (but it is somewhat expensive)."""
-		dead = [i for i in self.entities if not i.alive]
-		self.entities[:] = [i for i in self.entities if i.alive]
-		for i in dead:
-			# Experimental
-			self.handle_message_private(fireform.message.generic('_cleanup'), [i])
-			if i in self.message_handlers_by_entity:
-				del self.message_handlers_by_entity[i]
-			self.filter_root.remove(i)
-			self.post_message(fireform.message.dead_entity(i))
-		self.entities.sort(key = lambda x : x.ordering)
+		"""Remove the entities that have been killed since the last refresh,
+		and then add the entities that are waiting to be spawned.
+
+		The entity list is kept sorted by ordering as entities are added, so this
+		only has to deal with the entities that have changed."""
+		if self.killed:
+			dead = self.killed
+			self.killed = []
+			for i in dead:
+				self.entities.discard(i)
+			for i in dead:
+				# Experimental
+				self.handle_message_private(_cleanup_message, [i])
+			self.remove_message_handlers(dead)
+			for i in dead:
+				self.filter_root.remove(i)
+				self.post_message(fireform.message.dead_entity(i))
+		self.flush_spawns()
+
+	def entity_killed(self, entity):
+		"""Used internally.
+
+		Called when an entity in the world is killed, to take it out of the filters.
+		"""
+		self.filter_root.remove(entity)
+		self.killed.append(entity)
+
+	def remove_message_handlers(self, entities):
+		"""Used internally.
+
+		Drops the handlers that were registered for some entities.
+		Only the message types that the entities were listening for are touched,
+		and each of those is rebuilt once, however many entities are removed.
+		"""
+		removed = set()
+		mtypes = set()
+		for entity in entities:
+			handlers = self.message_handlers_by_entity.pop(entity, None)
+			if handlers:
+				removed.add(entity)
+				mtypes.update(handlers)
+		for mtype in mtypes:
+			# Assign new lists so that a dispatch already in progress is not disturbed
+			self.message_handlers[mtype] = [i for i in self.message_handlers[mtype] if i[0] not in removed]
+			self.message_handlers_frozen[mtype] = [i for i in self.message_handlers_frozen[mtype] if i[0] not in removed]
 
 	def add_entity(self, entity):
 		"""Add a single entity to the world.
@@ -48,16 +120,70 @@ class world:
 
 		"""
 		assert(isinstance(entity, fireform.entity.entity))
-		self.entities.append(entity)
+		self.register_entity(entity)
+		self.entities.add(entity)
+		if entity.alive:
+			self.filter_root.insert(entity)
+		self.handle_message(fireform.message.new_entity(entity))
+		return entity
+
+	def register_entity(self, entity):
+		"""Used internally.
+
+		Prepares an entity that is being added, and registers its message handlers.
+		This does not put it into the entity list or the filters.
+		"""
+		# The ordering is read once, so changing it afterwards has no effect
+		entity._ff_order = (entity.ordering, next(self.sequence))
+		by_type = collections.defaultdict(list)
 		for behaviour in entity.behaviours_list:
-			for message_type in fireform.behaviour.get_message_handles(behaviour):
-				self.message_handlers[message_type].append((entity, behaviour))
-				self.message_handlers_by_entity[entity][message_type].append(behaviour)
+			for name, handler, surpass in fireform.behaviour.bind_message_handles(behaviour):
+				message_type = fireform.message.type_id(name)
+				self.message_handlers[message_type].append((entity, handler))
+				if surpass:
+					self.message_handlers_frozen[message_type].append((entity, handler))
+				by_type[message_type].append((handler, surpass))
+		if by_type:
+			self.message_handlers_by_entity[entity] = by_type
 		# for t in self.message_types:
 		# 	self.register_message_handler(entity, t)
-		self.filter_root.insert(entity)
-		self.handle_message(fireform.message.new_entity(entity))
-		return entity
+		if entity.alive:
+			entity.kill_hooks.append(self.entity_killed)
+			# Tags may have been added or removed since the entity was created
+			entity._ff_mask = fireform.efilter.entity_mask(entity)
+		else:
+			self.killed.append(entity)
+
+	def spawn_batch(self, entities):
+		"""Queue entities to be added to the world.
+
+		They are added together the next time the entities are refreshed, which happens
+		once at the start of each tick. This is much faster than adding lots of entities
+		one at a time. A single :class:`fireform.message.new_entities` message is sent
+		for the batch, instead of a :class:`fireform.message.new_entity` for each entity.
+
+		:Parameters:
+			`entities`: iterable
+				An iterable that produces `entity` objects.
+
+		"""
+		for i in entities:
+			assert(isinstance(i, fireform.entity.entity))
+			self.spawning.append(i)
+
+	def flush_spawns(self):
+		"""Add the entities that are waiting to be spawned.
+
+		This is called by :meth:`refresh_entities`."""
+		if not self.spawning:
+			return
+		batch = self.spawning
+		self.spawning = []
+		for i in batch:
+			self.register_entity(i)
+		self.entities.update(batch)
+		self.filter_root.insert_many([i for i in batch if i.alive])
+		self.handle_message(fireform.message.new_entities(batch))
 
 	def add_entities(self, entities):
 		"""Add multiple entities to the world.
@@ -75,14 +201,37 @@ class world:
 		This thing is *merciless*."""
 		for i in self.entities:
 			i.kill()
-		self.entities = []
+		# Nothing is left to listen, so the tables can simply be emptied
+		self.message_handlers = collections.defaultdict(list)
+		self.message_handlers_frozen = collections.defaultdict(list)
+		self.message_handlers_by_entity = {}
+		self.entities = sortedcontainers.SortedListWithKey(key = ordering_key)
+		self.killed = []
 
 	def add_system(self, system):
 		"""Add a system to the world"""
 		self.systems.append(system)
 		self.systems_by_name[system.name()] = system
+		self.system_handlers.clear()
 		system.attach(self)
 
+	def compile_system_handlers(self, mtype):
+		"""Used internally.
+
+		Resolves the handlers of every system for a message type.
+		"""
+		handlers = []
+		handlers_frozen = []
+		handler_name = 'm_' + fireform.message.type_names[mtype]
+		for system in self.systems:
+			handler = getattr(system, handler_name, None)
+			if handler is not None:
+				handlers.append(handler)
+				if hasattr(handler, '_surpass_frozen'):
+					handlers_frozen.append(handler)
+		self.system_handlers[mtype] = (handlers, handlers_frozen)
+		return self.system_handlers[mtype]
+
 	def handle_message_result(self, result):
 		# This feels wrong in so many ways...
 		# But the syntactic sugar is too sweet to ignore.
@@ -95,23 +244,142 @@ class world:
 		"""Used internally."""
 		# If we encounter an unknown message type, record it
 		# and register the handlers on all existing entities
-		mtype = message.decipher_name()
-		# print('world handling', mtype)
-		for i in self.systems:
-			self.handle_message_result(i.handle_message(self, message))
-		self.message_handlers[mtype][:] = list(filter(lambda e: e[0].alive, self.message_handlers[mtype]))
-		for entity, behaviour in self.message_handlers[mtype]:
-			self.handle_message_result(behaviour.handle_message(self, entity, message))
-
-		# for i in (i for i in self.entities if i.alive):
-			# i.handle_message(self, message)
+		mtype = message.type_id
+		if mtype is None:
+			mtype = message.decipher_type_id()
+		spatial = self.spatial if mtype == _tick_type else None
+		if spatial is not None:
+			# Boxes may have been moved by hand since the last tick
+			spatial.dirty = True
+		systems = self.system_handlers.get(mtype)
+		if systems is None:
+			systems = self.compile_system_handlers(mtype)
+		for handler in systems[1] if self.frozen else systems[0]:
+			handler(self, message)
+		# Dead entities are only removed from the tables by refresh_entities,
+		# so anything killed since then still needs to be skipped here.
+		if self.frozen:
+			handlers = self.message_handlers_frozen[mtype]
+		else:
+			handlers = self.message_handlers[mtype]
+		for entity, handler in handlers:
+			if entity.alive:
+				result = handler(self, entity, message)
+				if result is not None:
+					self.handle_message_result(result)
+		if spatial is not None:
+			# Or by behaviours during this one
+			spatial.dirty = True
 
 	def handle_message_private(self, message, entities):
 		"""Used internally."""
-		mtype = message.decipher_name()
+		mtype = message.type_id
+		if mtype is None:
+			mtype = message.decipher_type_id()
+		frozen = self.frozen
 		for entity in entities:
-			for behaviour in self.message_handlers_by_entity[entity][mtype]:
-				self.handle_message_result(behaviour.handle_message(self, entity, message))
+			by_type = self.message_handlers_by_entity.get(entity)
+			if by_type:
+				for handler, surpass in by_type.get(mtype, ()):
+					if surpass or not frozen:
+						result = handler(self, entity, message)
+						if result is not None:
+							self.handle_message_result(result)
+
+	def post_messages_private(self, message_type, deliveries):
+		"""Sends many messages of the same type, each to a single entity.
+
+		Entities that do not handle the message are skipped without creating a message.
+		A single message object is reused for every delivery, so handlers must not
+		keep a reference to it once they have returned.
+
+		:Parameters:
+			`message_type`: subclass of `fireform.message.base`
+				The type of message to send.
+			`deliveries`: iterable
+				Pairs of ``(entity, arguments)``, where ``arguments`` is the tuple
+				of arguments that the message would be constructed with.
+
+		"""
+		mtype = message_type.type_id
+		if mtype is None:
+			# Older messages have no registered id, so deliver them one by one
+			for entity, arguments in deliveries:
+				self.handle_message_private(message_type(*arguments), [entity])
+			return
+		by_entity = self.message_handlers_by_entity
+		frozen = self.frozen
+		message = None
+		for entity, arguments in deliveries:
+			by_type = by_entity.get(entity)
+			if by_type:
+				handlers = by_type.get(mtype)
+				if handlers:
+					if message is None:
+						message = message_type.__new__(message_type)
+					message.__init__(*arguments)
+					for handler, surpass in handlers:
+						if surpass or not frozen:
+							result = handler(self, entity, message)
+							if result is not None:
+								self.handle_message_result(result)
+
+	def spatial_index(self):
+		"""Returns the :class:`fireform.spatial.index` of the entities with boxes.
+
+		It is made the first time it is needed. Every box is checked by the first
+		query after each tick starts and ends, so boxes moved in any way are found
+		in their new places. Boxes moved in the middle of a tick are only found
+		straight away if they are passed to the index's ``moved`` method, which
+		the motion system does for the entities it moves."""
+		if self.spatial is None:
+			self.spatial = self.filter_root.chain('box').pipe(fireform.spatial.index())
+		return self.spatial
+
+	def query_rect(self, left, bottom, right, top, rules = ''):
+		"""Returns the entities whose boxes overlap a rectangle.
+
+		:Parameters:
+			`rules`: string
+				Filter rules that the entities must match, such as ``'velocity > -#particle'``.
+
+		"""
+		return self.spatial_index().query_rect(left, bottom, right, top, rules)
+
+	def query_point(self, x, y, rules = ''):
+		"""Returns the entities whose boxes contain a point.
+
+		:Parameters:
+			`rules`: string
+				Filter rules that the entities must match.
+
+		"""
+		return self.spatial_index().query_point(x, y, rules)
+
+	def query_radius(self, x, y, radius, rules = ''):
+		"""Returns the entities whose boxes are within a distance of a point.
+
+		:Parameters:
+			`rules`: string
+				Filter rules that the entities must match.
+
+		"""
+		return self.spatial_index().query_radius(x, y, radius, rules)
+
+	def raycast(self, x1, y1, x2, y2, rules = '', limit = None):
+		"""Returns the entities whose boxes are crossed by a line segment, nearest first.
+
+		Each is given as a tuple of ``(entity, time)``, where time is the fraction
+		of the way along the segment at which the box is entered.
+
+		:Parameters:
+			`rules`: string
+				Filter rules that the entities must match.
+			`limit`: int
+				The most entities to return. Use ``1`` to find only the nearest.
+
+		"""
+		return self.spatial_index().raycast(x1, y1, x2, y2, rules, limit)
 
 	def post_message(self, message):
 		"""Sends a message to all systems and entities in the world that are listening for it.
@@ -0,0 +1,21 @@
+import pytest
+import fireform.util.clock
+
+
+def test_fixed_step():
+	stepper = fireform.util.clock.fixed_step(10)
+	assert stepper.advance(0.05) == 0
+	assert stepper.alpha == pytest.approx(0.5)
+	assert stepper.advance(0.06) == 1
+	assert stepper.alpha == pytest.approx(0.1)
+	# A slow frame is caught up with several ticks
+	assert stepper.advance(0.3) == 3
+	assert stepper.alpha == pytest.approx(0.1)
+
+
+def test_fixed_step_max_steps():
+	stepper = fireform.util.clock.fixed_step(4, max_steps = 4)
+	assert stepper.advance(2.125) == 4
+	assert stepper.dropped == 4
+	assert stepper.alpha == 0.5
+	assert stepper.advance(0.125) == 1
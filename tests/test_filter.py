@@ -49,3 +49,134 @@ def test_tag_mix():
 	assert entity_box not in f
 	assert entity_nothing not in f
 	assert entity_tags not in f
+
+def test_kill_removes():
+	world = fireform.world.world()
+	f = world.filter_root.chain('box')
+	a = world.add_entity(fireform.entity(fireform.data.box()))
+	b = world.add_entity(fireform.entity(fireform.data.box()))
+	a.kill()
+	assert a not in f
+	assert list(f) == [b]
+
+def test_remove_while_iterating():
+	for dense in [False, True]:
+		f = Filter('', dense)
+		entities = [fireform.entity() for i in range(10)]
+		for i in entities:
+			f.insert(i)
+		seen = []
+		for i in f:
+			seen.append(i)
+			for j in entities:
+				f.remove(j)
+		assert len(seen) == 10
+		assert len(f) == 0
+
+def test_dense_order():
+	f = Filter('', dense = True)
+	entities = [fireform.entity() for i in range(5)]
+	for i in entities:
+		f.insert(i)
+	f.remove(entities[1])
+	assert list(f) == [entities[0], entities[4], entities[2], entities[3]]
+
+def test_compiled_rules():
+	required, excluded = fireform.efilter.compile_rules('box')
+	assert required == fireform.efilter.bit('box')
+	assert excluded == 0
+	assert Filter('box').hash == Filter(' box ').hash
+	assert Filter('box').hash != Filter('-box').hash
+
+def test_tags_added_later():
+	world = fireform.world.world()
+	f = world.filter_root.chain('#late')
+	e = fireform.entity()
+	e.tags.add('late')
+	world.add_entity(e)
+	assert e in f
+
+def test_tags_removed_later():
+	world = fireform.world.world()
+	f = world.filter_root.chain('#early')
+	g = world.filter_root.chain('box > -#early')
+	e = fireform.entity(fireform.data.box(), tags = 'early')
+	e.tags.discard('early')
+	world.add_entity(e)
+	assert e not in f
+	assert e in g
+
+def test_archetypes():
+	world = fireform.world.world(archetypes = True)
+	moving = [world.add_entity(fireform.entity(fireform.data.box(), fireform.data.velocity(x = i))) for i in range(3)]
+	still = world.add_entity(fireform.entity(fireform.data.box()))
+	assert len(world.archetypes.query('box')) == 2
+	assert len(world.archetypes.query('box > velocity')) == 1
+	# Archetypes that appear later are added to existing queries
+	tagged = world.add_entity(fireform.entity(fireform.data.box(), fireform.data.velocity(x = 5), tags = 'tagged'))
+	assert len(world.archetypes.query('box > velocity')) == 2
+	moving[0].kill()
+	for entities, velocities in world.archetypes.blocks('velocity', 'velocity'):
+		assert [i.velocity for i in entities] == velocities
+	assert sorted(i.velocity.x for i in world.archetypes.entities('velocity')) == [1, 2, 5]
+	assert list(world.archetypes.entities('-velocity')) == [still]
+
+def test_archetypes_motion():
+	world = fireform.world.world(archetypes = True)
+	world.add_system(fireform.system.motion(collision_mode = 'disabled'))
+	entity = world.add_entity(fireform.entity(
+		fireform.data.box(x = 0, y = 0),
+		fireform.data.velocity(x = 1, y = 2),
+		fireform.data.acceleration(x = 1, y = 0)
+	))
+	for i in range(3):
+		world.post_message(fireform.message.tick())
+	assert entity.box.x == 2 + 3 + 4
+	assert entity.box.y == 6
+
+def test_archetype_filters():
+	world = fireform.world.world(archetypes = True)
+	f = world.filter_root.chain('box > velocity > -#still')
+	entities = [
+		world.add_entity(fireform.entity(fireform.data.box(), fireform.data.velocity(x = i)))
+		for i in range(3)
+	] + [
+		world.add_entity(fireform.entity(fireform.data.box(), fireform.data.velocity(x = 3), fireform.data.acceleration())),
+		world.add_entity(fireform.entity(fireform.data.box(), fireform.data.velocity(x = 4), tags = 'still')),
+		world.add_entity(fireform.entity(fireform.data.velocity(x = 5)))
+	]
+	assert f.archetypes is world.archetypes
+	# Filters made later use the archetypes as well
+	late = world.filter_root.chain('velocity')
+	assert late.archetypes is world.archetypes
+	assert sorted(i.velocity.x for i in f) == [0, 1, 2, 3]
+	assert sorted(i.velocity.x for i in late) == [0, 1, 2, 3, 4, 5]
+	# Entities killed while iterating are removed once the iteration is over
+	seen = []
+	for i in f:
+		seen.append(i)
+		entities[0].kill()
+		entities[3].kill()
+	assert len(seen) == 4
+	assert sorted(i.velocity.x for i in f) == [1, 2]
+	assert len(f) == 2
+
+def test_function():
+	f = Filter(lambda e: e['box'] is not None or 'two' in e.tags)
+	f.insert(entity_box)
+	f.insert(entity_nothing)
+	f.insert_many([entity_tags])
+	assert entity_box in f
+	assert entity_nothing not in f
+	assert entity_tags in f
+
+def test_function_archetypes():
+	world = fireform.world.world(archetypes = True)
+	f = world.filter_root.chain('box').pipe(Filter(lambda e: e.box.x > 0))
+	below = f.pipe(Filter('velocity'))
+	world.add_entity(fireform.entity(fireform.data.box(x = -1), fireform.data.velocity()))
+	b = world.add_entity(fireform.entity(fireform.data.box(x = 1), fireform.data.velocity()))
+	c = world.add_entity(fireform.entity(fireform.data.box(x = 2)))
+	assert f.archetypes is None and below.archetypes is None
+	assert sorted(f, key = id) == sorted([b, c], key = id)
+	assert list(below) == [b]
@@ -0,0 +1,50 @@
+from fireform import geom
+
+
+def test_segment_distance():
+	assert geom.segment_distance_squared(0, 0, 10, 0, 5, 3) == 9
+	assert geom.segment_distance_squared(0, 0, 10, 0, 13, 4) == 25
+	assert geom.segment_distance_squared(2, 2, 2, 2, 5, 6) == 25
+
+
+def test_segment_rectangle():
+	# Diagonal through the middle
+	assert geom.segment_rectangle_overlap(-5, -5, 15, 15, 0, 0, 10, 10)
+	# Entirely inside
+	assert geom.segment_rectangle_overlap(2, 2, 3, 4, 0, 0, 10, 10)
+	# Bounds overlap but the line misses the corner
+	assert not geom.segment_rectangle_overlap(5, 20, 20, 5, 0, 0, 10, 10)
+	# Passes through the corner
+	assert geom.segment_rectangle_overlap(5, 12, 12, 5, 0, 0, 10, 10)
+	# Running along an edge only touches it
+	assert not geom.segment_rectangle_overlap(0, 10, 10, 10, 0, 0, 10, 10)
+
+
+def test_segment_segment():
+	assert geom.segment_segment_overlap(0, 0, 10, 10, 0, 10, 10, 0)
+	assert not geom.segment_segment_overlap(0, 0, 4, 4, 0, 10, 10, 0)
+	# Touching at the ends
+	assert not geom.segment_segment_overlap(0, 0, 5, 5, 5, 5, 10, 0)
+	# Collinear
+	assert geom.segment_segment_overlap(0, 0, 5, 5, 3, 3, 8, 8)
+	assert not geom.segment_segment_overlap(0, 0, 5, 5, 6, 6, 8, 8)
+	assert not geom.segment_segment_overlap(0, 0, 5, 5, 5, 5, 8, 8)
+
+
+def test_segment_circle_time():
+	assert geom.segment_circle_time(0, 0, 10, 0, 6, 0, 2) == 0.4
+	# Starting inside
+	assert geom.segment_circle_time(6, 0, 10, 0, 6, 0, 2) == 0
+	# Passes by, or only touches the edge
+	assert geom.segment_circle_time(0, 3, 10, 0, 6, 0, 2) is None
+	assert geom.segment_circle_time(0, 2, 10, 0, 6, 0, 2) is None
+	# Stops short
+	assert geom.segment_circle_time(0, 0, 3, 0, 6, 0, 2) is None
+
+
+def test_segment_segment_time():
+	assert geom.segment_segment_time(0, 0, 10, 0, 5, -5, 5, 5) == 0.5
+	assert geom.segment_segment_time(0, 0, 4, 0, 5, -5, 5, 5) is None
+	assert geom.segment_segment_time(0, 10, 10, 0, 5, -5, 5, 5) is None
+	# Parallel
+	assert geom.segment_segment_time(0, 0, 10, 0, 0, 0, 5, 0) is None
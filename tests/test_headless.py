@@ -0,0 +1,153 @@
+import io
+import pytest
+import fireform
+import fireform.engine.headless as headless
+
+
+@pytest.fixture
+def engine(monkeypatch):
+	monkeypatch.setattr(fireform.engine, 'current', headless)
+	headless.calls.clear()
+	return headless
+
+
+class tick_counter(fireform.behaviour.base):
+
+	def __init__(self, stop_at = None):
+		self.ticks = 0
+		self.stop_at = stop_at
+
+	def m_tick(self, world, entity, message):
+		self.ticks += 1
+		if self.ticks == self.stop_at:
+			fireform.main.stop()
+
+
+def make_world(interpolate = False):
+	world = fireform.world.world()
+	world.add_system(fireform.system.camera())
+	world.add_system(fireform.system.image(interpolate = interpolate))
+	world.add_system(fireform.system.motion())
+	return world
+
+
+def test_run(engine, monkeypatch):
+	monkeypatch.setitem(fireform.resource.cache, 'dot', [engine.image(texture = (8, 8))])
+	world = make_world()
+	counter = tick_counter()
+	world.add_entity(fireform.entity(counter))
+	mover = world.add_entity(fireform.entity(
+		fireform.data.box(width = 8, height = 8),
+		fireform.data.velocity(2, 0),
+		fireform.data.image('dot')
+	))
+	assert fireform.main.run(world, ticks = 10, draw_rate = 5) == 10
+	assert counter.ticks == 10
+	assert mover.box.x == 20
+	sprite = mover.image.sprite_object
+	assert sprite.x == 20
+	assert sprite.image.width == 8
+	assert len(sprite.batch.sprites) == 1
+	assert engine.calls['batch'] == 2
+	assert engine.camera == (0, 0, 1)
+	mover.kill()
+	fireform.main.run(world, ticks = 1, draw_rate = 0)
+	assert sprite.batch is None
+
+
+def test_stop(engine):
+	world = make_world()
+	counter = tick_counter(stop_at = 3)
+	world.add_entity(fireform.entity(counter))
+	assert fireform.main.run(world) == 3
+	assert counter.ticks == 3
+
+
+def test_interpolate(engine, monkeypatch):
+	monkeypatch.setitem(fireform.resource.cache, 'dot', [engine.image(texture = (8, 8))])
+	world = make_world(interpolate = True)
+	mover = world.add_entity(fireform.entity(
+		fireform.data.box(width = 8, height = 8),
+		fireform.data.velocity(10, 0),
+		fireform.data.image('dot')
+	))
+	fireform.main.run(world, ticks = 2)
+	world.post_message(fireform.message.interpolate(0.5))
+	assert mover.image.sprite_object.x == 15
+	world.post_message(fireform.message.interpolate(1))
+	assert mover.image.sprite_object.x == 20
+
+
+class alpha_recorder(fireform.behaviour.base):
+
+	def __init__(self):
+		self.alphas = []
+
+	def m_interpolate(self, world, entity, message):
+		self.alphas.append(message.alpha)
+
+
+def test_run_interpolates(engine):
+	world = make_world()
+	recorder = alpha_recorder()
+	world.add_entity(fireform.entity(recorder))
+	fireform.main.run(world, ticks = 6, draw_rate = 2)
+	assert recorder.alphas == [1.0, 1.0, 1.0]
+	fireform.main.run(world, ticks = 2, draw_rate = 0)
+	assert len(recorder.alphas) == 3
+
+
+def test_image_size(engine):
+	png = b'\x89PNG\r\n\x1a\n' + b'\x00\x00\x00\x0dIHDR' + b'\x00\x00\x00\x40\x00\x00\x00\x20'
+	image = engine.image(io.BytesIO(png))
+	assert (image.width, image.height) == (64, 32)
+	grid = engine.image_grid(image, 4, 2)
+	assert len(grid.get_strip(0, 8)) == 8
+	assert grid.get_frame(3).width == 16
+
+
+def test_load_sdl2(monkeypatch):
+	monkeypatch.setattr(fireform.engine, 'current', None)
+	with pytest.raises(NotImplementedError):
+		fireform.engine.load('sdl2')
+
+
+@pytest.mark.parametrize('pool_first', [True, False])
+def test_pool_capacity_sprites(engine, monkeypatch, pool_first):
+	monkeypatch.setitem(fireform.resource.cache, 'dot', [engine.image(texture = (8, 8))])
+	world = fireform.world.world()
+	bullets = fireform.system.pool(lambda: fireform.entity(
+		fireform.data.box(width = 8, height = 8),
+		fireform.data.image('dot')
+	), capacity = 2)
+	if pool_first:
+		world.add_system(bullets)
+	world.add_system(fireform.system.camera())
+	world.add_system(fireform.system.image())
+	if not pool_first:
+		world.add_system(bullets)
+	spawned = [bullets.spawn() for i in range(5)]
+	fireform.main.run(world, ticks = 1)
+	sprites = [e.image.sprite_object for e in spawned]
+	batch = sprites[0].batch
+	assert len(batch.sprites) == 5
+	for e in spawned:
+		e.kill()
+	fireform.main.run(world, ticks = 1, draw_rate = 0)
+	# Only the entities that fit in the pool keep their sprites
+	assert len(bullets.free) == 2
+	assert batch.sprites == {e.image.sprite_object for e in bullets.free}
+	assert all(not e.image.sprite_object.visible for e in bullets.free)
+	assert sum(1 for s in sprites if s.batch is None) == 3
+
+
+def test_debug_targets_degenerate_boxes(engine):
+	world = fireform.world.world()
+	point = world.add_entity(fireform.entity(fireform.data.box(x = 0, y = 0, width = 0, height = 0)))
+	flipped = world.add_entity(fireform.entity(fireform.data.box(x = 100, y = 0, width = -10, height = -10)))
+	world.add_entity(fireform.entity(fireform.data.box(x = 100, y = 0, width = 50, height = 50)))
+	debug = fireform.system.debug()
+	debug.mouse_x, debug.mouse_y = 0, 0
+	assert debug.find_targeted(world) is point
+	debug.mouse_x, debug.mouse_y = 102, 2
+	assert debug.find_targeted(world) is flipped
@@ -1,3 +1,6 @@
+import copy
+import sys
+import pytest
 import fireform
 
 def test_velocity():
@@ -14,3 +17,347 @@ def test_velocity():
 		world.post_message(fireform.message.tick())
 	assert entity.box.x == VEL_X * NUM_TICKS
 	assert entity.box.y == VEL_Y * NUM_TICKS
+
+
+class collision_recorder(fireform.behaviour.base):
+
+	def __init__(self):
+		self.others = []
+
+	def m_collision(self, world, entity, message):
+		self.others.append(message.other)
+
+
+def make_collider(x, y, vx = 0, vy = 0, bucket = None, **kwargs):
+	contents = [
+		fireform.data.box(x = x, y = y, width = 10, height = 10),
+		fireform.data.velocity(x = vx, y = vy),
+		collision_recorder()
+	]
+	if bucket is not None:
+		contents.append(fireform.data.collision_bucket(bucket))
+	return fireform.entity(*contents, **kwargs)
+
+
+def test_collision():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	a = world.add_entity(make_collider(0, 0))
+	b = world.add_entity(make_collider(5, 5))
+	c = world.add_entity(make_collider(100, 0))
+	world.post_message(fireform.message.tick())
+	assert a[collision_recorder].others == [b]
+	assert b[collision_recorder].others == [a]
+	assert c[collision_recorder].others == []
+
+
+def test_collision_touching():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	a = world.add_entity(make_collider(0, 0))
+	b = world.add_entity(make_collider(10, 0))
+	world.post_message(fireform.message.tick())
+	assert a[collision_recorder].others == []
+
+
+def test_collision_moving():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	a = world.add_entity(make_collider(0, 0, vx = 4))
+	b = world.add_entity(make_collider(20, 0, vx = -4))
+	hits = []
+	for i in range(4):
+		world.post_message(fireform.message.tick())
+		hits.append(len(a[collision_recorder].others))
+	# The boxes overlap on the second and third ticks, then pass each other
+	assert hits == [0, 1, 2, 2]
+
+
+def test_collision_killed():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	a = world.add_entity(make_collider(0, 0))
+	b = world.add_entity(make_collider(5, 0))
+	world.post_message(fireform.message.tick())
+	b.kill()
+	world.refresh_entities()
+	world.post_message(fireform.message.tick())
+	assert a[collision_recorder].others == [b]
+	# The broadphase would otherwise keep the dead entity around
+	motion = world.systems_by_name['fireform.system.motion']
+	assert all(b not in i.proxies for i in motion.broadphases.values())
+
+
+def test_collision_static():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion(static_index = True))
+	wall = world.add_entity(fireform.entity(
+		fireform.data.box(x = 50, y = 0, width = 20, height = 400),
+		collision_recorder(),
+		tags = 'solid'
+	))
+	other_wall = world.add_entity(fireform.entity(
+		fireform.data.box(x = 50, y = 0, width = 400, height = 10),
+		collision_recorder(),
+		tags = 'solid'
+	))
+	a = world.add_entity(make_collider(0, 100, vx = 10))
+	for i in range(5):
+		world.post_message(fireform.message.tick())
+	assert wall[collision_recorder].others == [a, a]
+	assert a[collision_recorder].others == [wall, wall]
+	assert other_wall[collision_recorder].others == []
+
+
+def test_collision_broadphases_agree():
+	results = []
+	for settings in [{}, {'broadphase': 'grid', 'cell_size': 16}, {'bucket_settings': {'default': {'broadphase': 'grid'}}}]:
+		world = fireform.world.world()
+		world.add_system(fireform.system.motion(**settings))
+		entities = [world.add_entity(make_collider(i * 7 % 60, i * 13 % 60, vx = i % 3 - 1)) for i in range(30)]
+		for i in range(5):
+			world.post_message(fireform.message.tick())
+		results.append([sorted(entities.index(j) for j in i[collision_recorder].others) for i in entities])
+	assert results[0] == results[1] == results[2]
+
+
+def test_array_store():
+	pytest.importorskip('numpy')
+	results = []
+	for array_store in (False, True):
+		world = fireform.world.world()
+		world.add_system(fireform.system.motion(array_store = array_store))
+		a = world.add_entity(fireform.entity(
+			fireform.data.box(x = 0, y = 0),
+			fireform.data.velocity(x = 1, y = 2),
+			fireform.data.acceleration(x = 1, y = 0),
+			fireform.data.friction(0.5)
+		))
+		b = world.add_entity(make_collider(20, 5, vx = -2))
+		for i in range(10):
+			world.post_message(fireform.message.tick())
+		b.box.left = 0
+		results.append((a.box.x, a.box.y, a.velocity.x, b.box.x, len(b[collision_recorder].others)))
+		# Values are copied back out of the store when the entity dies
+		a.kill()
+		world.refresh_entities()
+		assert type(a.box) is fireform.data.box
+		assert (a.box.x, a.box.y, a.velocity.x) == results[-1][:3]
+	assert results[0] == pytest.approx(results[1])
+
+
+def test_array_store_without_velocity():
+	pytest.importorskip('numpy')
+	results = []
+	for array_store in (False, True):
+		world = fireform.world.world()
+		world.add_system(fireform.system.motion(array_store = array_store))
+		a = world.add_entity(fireform.entity(
+			fireform.data.box(x = 0, y = 0),
+			fireform.data.acceleration(x = 1, y = 2),
+			fireform.data.friction(0.5)
+		))
+		b = world.add_entity(fireform.entity(
+			fireform.data.box(x = 0, y = 0),
+			fireform.data.velocity(x = 1, y = 0),
+			fireform.data.acceleration(x = 1, y = 0)
+		))
+		for i in range(3):
+			world.post_message(fireform.message.tick())
+		results.append((a.box.x, a.box.y, b.box.x))
+	assert results[0] == (0, 0, 9)
+	assert results[1] == pytest.approx(results[0])
+
+
+def test_array_store_copy():
+	pytest.importorskip('numpy')
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion(array_store = True))
+	a = world.add_entity(fireform.entity(
+		fireform.data.box(x = 3, y = 4, width = 6, anchor_x = 0),
+		fireform.data.velocity(x = 1, y = 2)
+	))
+	for method in (copy.copy, copy.deepcopy):
+		box = method(a.box)
+		velocity = method(a.velocity)
+		assert type(box) is fireform.data.box
+		assert type(velocity) is fireform.data.velocity
+		assert (box.left, box.y, box.width) == (3, 4, 6)
+		assert (velocity.x, velocity.y) == (1, 2)
+		box.x = 10
+		assert a.box.x == 3
+
+
+def test_narrowphase_batched(monkeypatch):
+	pytest.importorskip('numpy')
+	# fireform.system.motion is shadowed by the class of the same name
+	motion_module = sys.modules['fireform.system.motion']
+	shapes = ['rectangle', 'circle', 'line_up', 'line_down']
+	pairs = []
+	for i in range(800):
+		a = fireform.entity(
+			fireform.data.box(x = i % 7, y = i % 5, width = 6 + i % 4, height = 6),
+			fireform.data.collision_mask(shapes[i % 4])
+		)
+		b = fireform.entity(
+			fireform.data.box(x = 5 + i % 3, y = 5 + i % 11 / 2, width = 6, height = 5 + i % 6),
+			fireform.data.collision_mask(shapes[i // 4 % 4])
+		)
+		# The broadphase only produces pairs with overlapping boxes
+		if fireform.geom.box_overlap(a.box, b.box):
+			pairs.append((a, b))
+	batched = motion_module.filter_overlapping_masks(pairs)
+	monkeypatch.setattr(motion_module, 'NARROWPHASE_BATCH_SIZE', len(pairs) + 1)
+	single = motion_module.filter_overlapping_masks(pairs)
+	assert 0 < len(batched) < len(pairs)
+	assert set(batched) == set(single)
+
+
+class impact_recorder(fireform.behaviour.base):
+
+	def __init__(self):
+		self.impacts = []
+
+	def m_collision(self, world, entity, message):
+		self.impacts.append((message.other, message.time, tuple(message.normal)))
+
+
+def test_collision_swept():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion(collision_mode = 'swept'))
+	wall = world.add_entity(fireform.entity(
+		fireform.data.box(x = 101, y = 0, width = 2, height = 100),
+	))
+	bullet = world.add_entity(fireform.entity(
+		fireform.data.box(x = 0, y = 0, width = 4, height = 4, anchor_x = 0),
+		fireform.data.velocity(x = 192),
+		impact_recorder()
+	))
+	world.post_message(fireform.message.tick())
+	# The bullet passes right over the wall in a single tick
+	assert bullet.box.left == 192
+	assert bullet[impact_recorder].impacts == [(wall, 0.5, (-1, 0))]
+
+
+def test_collision_bucket_pairs():
+	world = fireform.world.world()
+	motion = fireform.system.motion(bucket_pairs = [('player', 'enemy_bullets')])
+	world.add_system(motion)
+	player = world.add_entity(make_collider(0, 0, bucket = 'player'))
+	bullet = world.add_entity(make_collider(5, 0, bucket = 'enemy_bullets'))
+	other_bullet = world.add_entity(make_collider(5, 5, bucket = 'enemy_bullets'))
+	wall = world.add_entity(make_collider(0, 5, bucket = 'walls'))
+	world.post_message(fireform.message.tick())
+	assert sorted(player[collision_recorder].others, key = id) == sorted([bullet, other_bullet], key = id)
+	assert bullet[collision_recorder].others == [player]
+	assert other_bullet[collision_recorder].others == [player]
+	assert wall[collision_recorder].others == []
+	# The walls have nothing to hit, so they do not get a broadphase
+	assert list(motion.broadphases) == ['player']
+	player.kill()
+	world.refresh_entities()
+	world.post_message(fireform.message.tick())
+	assert 'player' not in motion.sorter_buckets.contents
+
+
+class contact_recorder(fireform.behaviour.base):
+
+	def __init__(self):
+		self.events = []
+
+	def m_collision(self, world, entity, message):
+		self.events.append('collision')
+
+	def m_collision_enter(self, world, entity, message):
+		self.events.append('enter')
+
+	def m_collision_stay(self, world, entity, message):
+		self.events.append('stay')
+
+	def m_collision_exit(self, world, entity, message):
+		self.events.append('exit')
+
+
+def test_collision_contacts():
+	for repeat in [True, False]:
+		world = fireform.world.world()
+		world.add_system(fireform.system.motion(contact_events = True, repeat_collisions = repeat))
+		a = make_collider(0, 0, vx = 4)
+		a.attach(contact_recorder())
+		world.add_entity(a)
+		b = world.add_entity(make_collider(20, 0, vx = -4))
+		for i in range(4):
+			world.post_message(fireform.message.tick())
+		if repeat:
+			assert a[contact_recorder].events == ['collision', 'enter', 'collision', 'stay', 'exit']
+		else:
+			assert a[contact_recorder].events == ['collision', 'enter', 'stay', 'exit']
+		assert len(b[collision_recorder].others) == (2 if repeat else 1)
+
+
+def make_obstacle(x, y, shape = None, bucket = None, size = 10, **kwargs):
+	contents = [fireform.data.box(x = x, y = y, width = size, height = size)]
+	if shape is not None:
+		contents.append(fireform.data.collision_mask(shape))
+	if bucket is not None:
+		contents.append(fireform.data.collision_bucket(bucket))
+	return fireform.entity(*contents, **kwargs)
+
+
+def test_raycast():
+	world = fireform.world.world()
+	motion = fireform.system.motion()
+	world.add_system(motion)
+	near = world.add_entity(make_obstacle(20, 0))
+	far = world.add_entity(make_obstacle(300, 0, bucket = 'walls'))
+	world.add_entity(make_obstacle(60, 0, tags = 'no-collision'))
+	hits = motion.raycast(0, 0, 400, 0)
+	assert [e for e, t in hits] == [near, far]
+	assert hits[0][1] == pytest.approx(15 / 400)
+	assert motion.raycast(0, 0, 400, 0, limit = 1) == [hits[0]]
+	assert [e for e, t in motion.raycast(0, 0, 400, 0, buckets = {'walls'})] == [far]
+	assert [e for e, t in motion.raycast(0, 0, 400, 0, ignore = {near})] == [far]
+	assert not motion.line_of_sight(0, 0, 400, 0)
+	assert motion.line_of_sight(0, 20, 400, 20)
+
+
+def test_raycast_masks():
+	world = fireform.world.world()
+	motion = fireform.system.motion()
+	world.add_system(motion)
+	circle = world.add_entity(make_obstacle(0, 0, 'circle', size = 20))
+	line = world.add_entity(make_obstacle(100, 0, 'line_up', size = 20))
+	# Crosses the corner of the circle's box, but not the circle
+	assert motion.raycast(5, 12, 12, 5) == []
+	hits = motion.raycast(-20, 0, 20, 0)
+	assert [e for e, t in hits] == [circle]
+	assert hits[0][1] == pytest.approx(0.25)
+	# Crosses the line's box above the line, then the line itself
+	assert motion.raycast(92, 5, 96, 9) == []
+	hits = motion.raycast(80, 0, 120, 0)
+	assert [e for e, t in hits] == [line]
+	assert hits[0][1] == pytest.approx(0.5)
+	# With masks ignored, only the boxes matter
+	plain = fireform.world.world()
+	ignoring = fireform.system.motion(ignore_masks = True)
+	plain.add_system(ignoring)
+	plain.add_entity(make_obstacle(0, 0, 'circle', size = 20))
+	assert len(ignoring.raycast(5, 12, 12, 5)) == 1
+
+
+def test_raycast_many():
+	world = fireform.world.world()
+	motion = fireform.system.motion()
+	world.add_system(motion)
+	for y in range(0, 100, 20):
+		world.add_entity(make_obstacle(50, y))
+	rays = [(0, y, 100, y) for y in range(0, 100, 10)]
+	results = motion.raycast_many(rays)
+	assert len(results) == len(rays)
+	for (x1, y1, x2, y2), hits in zip(rays, results):
+		assert hits == motion.raycast(x1, y1, x2, y2, limit = 1)
+		assert len(hits) == (1 if y1 % 20 == 0 else 0)
+	# Rays see where things have moved to after the tick
+	mover = world.add_entity(make_collider(0, 200, vx = 100))
+	world.post_message(fireform.message.tick())
+	assert [e for e, t in motion.raycast(100, 190, 100, 220)] == [mover]
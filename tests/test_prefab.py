@@ -0,0 +1,67 @@
+import fireform
+
+
+class marker(fireform.behaviour.base):
+
+	def __init__(self):
+		self.ticks = 0
+
+	def m_tick(self, world, entity, message):
+		self.ticks += 1
+
+
+bullet = fireform.prefab.prefab(
+	(fireform.data.box, {'width': 12, 'height': 12}),
+	fireform.data.velocity,
+	marker,
+	tags = 'bullet',
+	ordering = 3
+)
+
+
+def test_prefab_matches_entity():
+	made = bullet.create()
+	built = fireform.entity(fireform.data.box(width = 12, height = 12), fireform.data.velocity(), marker(), tags = 'bullet', ordering = 3)
+	assert made._ff_mask == built._ff_mask
+	assert set(made.contents) == set(built.contents)
+	assert set(made.datum) == set(built.datum)
+	assert set(made.behaviours) == set(built.behaviours)
+	assert made.box.width == 12
+	assert made.tags == {'bullet'}
+	assert made.ordering == 3
+
+
+def test_prefab_components_are_separate():
+	a, b = bullet.stamp(2)
+	a.box.x = 5
+	assert b.box.x == 0
+	assert a[marker] is not b[marker]
+
+
+def test_prefab_in_world():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion())
+	world.spawn_batch(bullet.stamp(10))
+	world.refresh_entities()
+	f = world.filter_root.chain('box > velocity > #bullet')
+	assert len(f) == 10
+	world.post_message(fireform.message.tick())
+	assert all(i[marker].ticks == 1 for i in world.entities)
+
+
+def test_release_entities():
+	fireform.configure(debug = False)
+	try:
+		e = fireform.entity(fireform.data.box(), tags = 'thing')
+		made = bullet.create()
+	finally:
+		fireform.configure(debug = True)
+	for i in [e, made]:
+		assert type(i).__name__ == 'release_entity'
+		assert type(i).__setattr__ is object.__setattr__
+		assert isinstance(i, fireform.entity)
+	assert e.box.x == 0
+	world = fireform.world.world()
+	world.add_entity(e)
+	assert e in world.filter_root.chain('box > #thing')
+	assert type(fireform.entity()) is fireform.entity
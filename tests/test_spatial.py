@@ -0,0 +1,89 @@
+import fireform
+from fireform.spatial import cells_on_segment
+
+
+def make_box(x, y, width = 10, height = 10, tags = ()):
+	return fireform.entity(fireform.data.box(x = x, y = y, width = width, height = height), tags = tags)
+
+
+def test_cells_on_segment():
+	assert [c[:2] for c in cells_on_segment(5, 5, 35, 5, 10)] == [(0, 0), (1, 0), (2, 0), (3, 0)]
+	assert [c[:2] for c in cells_on_segment(5, 5, 5, -15, 10)] == [(0, 0), (0, -1), (0, -2)]
+	assert [c[:2] for c in cells_on_segment(1, 1, 2, 2, 10)] == [(0, 0)]
+
+
+def test_queries():
+	world = fireform.world.world()
+	a = world.add_entity(make_box(0, 0))
+	b = world.add_entity(make_box(300, 0, tags = 'enemy'))
+	c = world.add_entity(make_box(5000, 5000, width = 400, height = 400))
+	assert world.query_point(0, 0) == [a]
+	assert world.query_point(5, 5) == [a]
+	assert world.query_point(5150, 4850) == [c]
+	assert world.query_point(100, 100) == []
+	assert sorted(world.query_rect(-10, -10, 400, 10), key = id) == sorted([a, b], key = id)
+	assert world.query_rect(-10, -10, 400, 10, '#enemy') == [b]
+	assert world.query_rect(-10, -10, 400, 10, '-#enemy') == [a]
+	assert world.query_radius(20, 0, 16) == [a]
+	assert world.query_radius(20, 0, 14) == []
+
+
+def test_queries_follow_movement():
+	world = fireform.world.world()
+	world.add_system(fireform.system.motion(collision_mode = 'disabled'))
+	a = world.add_entity(fireform.entity(fireform.data.box(x = 0, y = 0), fireform.data.velocity(x = 500, y = 0)))
+	assert world.query_point(0, 0) == [a]
+	world.post_message(fireform.message.tick())
+	assert world.query_point(0, 0) == []
+	assert world.query_point(500, 0) == [a]
+	a.kill()
+	assert world.query_point(500, 0) == []
+
+
+class shove(fireform.behaviour.base):
+
+	def m_tick(self, world, entity, message):
+		entity.box.x += 100
+
+
+def test_queries_follow_behaviours():
+	world = fireform.world.world()
+	a = world.add_entity(fireform.entity(fireform.data.box(x = 0, y = 0), shove()))
+	b = world.add_entity(make_box(500, 0))
+	assert world.query_point(0, 0) == [a]
+	world.post_message(fireform.message.tick())
+	assert world.query_point(0, 0) == []
+	assert world.query_point(100, 0) == [a]
+	# Boxes moved between ticks are found once the next one starts
+	b.box.x = 800
+	world.post_message(fireform.message.tick())
+	assert world.query_point(200, 0) == [a]
+	assert world.query_point(800, 0) == [b]
+	# Or straight away, if the index is told about them
+	b.box.x = 900
+	world.spatial_index().moved([b])
+	assert world.query_point(900, 0) == [b]
+
+
+def test_queries_degenerate_boxes():
+	world = fireform.world.world()
+	point = world.add_entity(make_box(0, 0, width = 0, height = 0))
+	flipped = world.add_entity(make_box(100, 0, width = -10, height = -20))
+	assert world.query_point(0, 0) == [point]
+	assert world.query_point(104, 9) == [flipped]
+	flipped.box.x = 300
+	world.spatial_index().moved([flipped])
+	assert world.query_point(304, -9) == [flipped]
+
+
+def test_raycast():
+	world = fireform.world.world()
+	near = world.add_entity(make_box(100, 0))
+	far = world.add_entity(make_box(1000, 0))
+	world.add_entity(make_box(500, 100))
+	hits = world.raycast(0, 0, 2000, 0)
+	assert [i[0] for i in hits] == [near, far]
+	assert abs(hits[0][1] - 95 / 2000) < 1e-9
+	assert world.raycast(0, 0, 2000, 0, limit = 1) == hits[:1]
+	assert world.raycast(2000, 0, 0, 0, limit = 1)[0][0] is far
+	assert world.raycast(0, 50, 2000, 50) == []
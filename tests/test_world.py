@@ -0,0 +1,163 @@
+import fireform
+
+
+class counter(fireform.behaviour.base):
+
+	def __init__(self):
+		self.ticks = 0
+		self.frozen_ticks = 0
+
+	def m_tick(self, world, entity, message):
+		self.ticks += 1
+
+	@fireform.message.surpass_frozen
+	def m_animate(self, world, entity, message):
+		self.frozen_ticks += 1
+
+
+def test_dispatch():
+	world = fireform.world.world()
+	c = counter()
+	world.add_entity(fireform.entity(c))
+	world.post_message(fireform.message.tick())
+	world.post_message(fireform.message.tick())
+	assert c.ticks == 2
+
+
+def test_dispatch_frozen():
+	world = fireform.world.world()
+	c = counter()
+	world.add_entity(fireform.entity(c))
+	world.frozen = True
+	world.post_message(fireform.message.tick())
+	world.post_message(fireform.message.animate())
+	assert c.ticks == 0
+	assert c.frozen_ticks == 1
+
+
+def test_dispatch_dead():
+	world = fireform.world.world()
+	c = counter()
+	e = world.add_entity(fireform.entity(c))
+	e.kill()
+	world.post_message(fireform.message.tick())
+	assert c.ticks == 0
+	world.refresh_entities()
+	assert e not in world.message_handlers_by_entity
+	assert all(i[0] is not e for i in world.message_handlers[fireform.message.tick().type_id])
+
+
+def test_dispatch_many_dead():
+	world = fireform.world.world()
+	counters = [counter() for i in range(10)]
+	entities = [world.add_entity(fireform.entity(c)) for c in counters]
+	for e in entities[::2]:
+		e.kill()
+	world.refresh_entities()
+	world.post_message(fireform.message.tick())
+	assert [c.ticks for c in counters] == [0, 1] * 5
+	assert len(world.message_handlers[fireform.message.tick().type_id]) == 5
+	world.destroy_all_entities()
+	world.post_message(fireform.message.tick())
+	assert [c.ticks for c in counters] == [0, 1] * 5
+	assert not world.message_handlers_by_entity
+
+
+def test_message_type_ids():
+	assert fireform.message.tick() is fireform.message.tick()
+	assert fireform.message.tick().type_id == fireform.message.type_id('tick')
+	assert fireform.message.key_press.type_id == fireform.message.type_id('key_press')
+	assert fireform.message.key_press.handler_name == 'm_key_press'
+	assert fireform.message.type_names[fireform.message.draw.type_id] == 'draw'
+
+
+class receiver(fireform.behaviour.base):
+
+	def __init__(self):
+		self.received = []
+
+	def m_collision_enter(self, world, entity, message):
+		self.received.append((message.other, id(message)))
+
+
+def test_post_messages_private():
+	world = fireform.world.world()
+	a = world.add_entity(fireform.entity(receiver()))
+	b = world.add_entity(fireform.entity(receiver()))
+	c = world.add_entity(fireform.entity())
+	world.post_messages_private(fireform.message.collision_enter, [(a, (b,)), (c, (a,)), (b, (a,))])
+	assert [i[0] for i in a[receiver].received] == [b]
+	assert [i[0] for i in b[receiver].received] == [a]
+	# The message object is shared between deliveries
+	assert a[receiver].received[0][1] == b[receiver].received[0][1]
+
+
+def test_entity_ordering():
+	world = fireform.world.world()
+	a = world.add_entity(fireform.entity(ordering = 1))
+	b = world.add_entity(fireform.entity(ordering = 0))
+	c = world.add_entity(fireform.entity(ordering = 1))
+	d = world.add_entity(fireform.entity(ordering = -1))
+	assert list(world.entities) == [d, b, a, c]
+	a.kill()
+	assert len(world.killed) == 1
+	world.refresh_entities()
+	assert list(world.entities) == [d, b, c]
+	assert world.killed == []
+
+
+class spawn_listener(fireform.system.base):
+
+	def __init__(self):
+		self.batches = []
+		self.singles = 0
+
+	def name(self):
+		return 'spawn_listener'
+
+	def m_new_entity(self, world, message):
+		self.singles += 1
+
+	def m_new_entities(self, world, message):
+		self.batches.append(len(message.entities))
+
+
+def test_spawn_batch():
+	world = fireform.world.world()
+	listener = spawn_listener()
+	world.add_system(listener)
+	f = world.filter_root.chain('#thing')
+	things = [fireform.entity(counter(), tags = 'thing') for i in range(5)]
+	world.spawn_batch(things)
+	world.spawn_batch([fireform.entity()])
+	assert len(world.entities) == 0
+	world.refresh_entities()
+	assert len(world.entities) == 6
+	assert len(f) == 5
+	assert listener.batches == [6]
+	assert listener.singles == 0
+	world.post_message(fireform.message.tick())
+	assert all(i[counter].ticks == 1 for i in things)
+
+
+def test_pool():
+	world = fireform.world.world()
+	def reset(entity, x):
+		entity.box.x = x
+	bullets = fireform.system.pool(lambda: fireform.entity(fireform.data.box(), counter()), reset, name = 'bullets')
+	world.add_system(bullets)
+	f = world.filter_root.chain('box')
+	first = bullets.spawn(5)
+	assert first.box.x == 5
+	first.kill()
+	world.refresh_entities()
+	assert len(f) == 0
+	second = bullets.spawn(7)
+	assert second is first
+	assert second.alive and second.box.x == 7
+	assert bullets.created == 1
+	assert list(f) == [second]
+	world.post_message(fireform.message.tick())
+	assert second[counter].ticks == 1
+	second.kill()
+	assert len(f) == 0